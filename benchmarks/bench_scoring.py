@@ -0,0 +1,181 @@
+# bench_scoring.py
+"""
+Benchmarks for the scoring hot paths at increasing batch sizes.
+
+    python benchmarks/bench_scoring.py
+    python benchmarks/bench_scoring.py --sizes 1 1000 10000 --cases score recommend
+    python benchmarks/bench_scoring.py --compare benchmarks/results/baseline.json --threshold 0.15
+
+Each case runs against the artifacts in models/ on rows resampled from the
+raw dataset, so no network access is needed. Results (latency percentiles,
+rows/sec, peak traced memory) are written as JSON; with --compare, cases
+whose median latency grew by more than --threshold are reported and the
+exit status is 1.
+"""
+import os
+import sys
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "streamlit_app"))
+
+from model_registry import registry
+from prediction import CHURN_ARTIFACTS, preprocess_churn, predict_churn, predict_churn_batch, predict_churn_profile
+from segmentation import SEGMENTATION_ARTIFACTS, preprocess_input, assign_cluster, assign_clusters
+from recommendation import get_recommendation_engine, recommend_offer
+from pipeline import ScoringPipeline
+from schema import read_customers_csv
+from score import peak_rss_mb
+
+DATA_PATH = os.path.join(BENCH_DIR, "..", "data", "raw", "netflix_customer_churn.csv")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_SIZES = [1, 1_000, 10_000, 100_000, 1_000_000]
+
+
+# --- Cases: name -> setup(df) returning the zero-argument call to time ---
+def _recommend_setup(df):
+    # Model outputs are computed once, outside the timed call
+    segment = assign_clusters(df)
+    churn_prob = predict_churn_batch(df)["churn_probability"].to_numpy()
+    if len(df) == 1:
+        return lambda: recommend_offer(segment[0], churn_prob[0], df["subscription_type"].iloc[0])
+    engine = get_recommendation_engine()
+    return lambda: engine.recommend_batch(segment, churn_prob, df["subscription_type"])
+
+
+def _compiled_setup(df):
+    # One row takes the dict path the app's single-customer analysis uses
+    if len(df) == 1:
+        profile = df.iloc[0].to_dict()
+        return lambda: predict_churn_profile(profile, engine="compiled")
+    return lambda: predict_churn_batch(df, engine="compiled")
+
+
+CASES = {
+    "preprocess_churn": lambda df: lambda: preprocess_churn(df),
+    "predict_churn": lambda df: (lambda: predict_churn(df)) if len(df) == 1 else (lambda: predict_churn_batch(df)),
+    "predict_churn_compiled": _compiled_setup,
+    "preprocess_input": lambda df: lambda: preprocess_input(df),
+    "assign_cluster": lambda df: (lambda: assign_cluster(df)) if len(df) == 1 else (lambda: assign_clusters(df)),
+    "recommend": _recommend_setup,
+    "score": lambda df: lambda: ScoringPipeline().score(df),
+}
+
+
+def make_batch(sample: pd.DataFrame, rows: int, seed: int = 42) -> pd.DataFrame:
+    """rows customers resampled (with replacement) from the raw dataset."""
+    positions = np.random.default_rng(seed).integers(0, len(sample), rows)
+    return sample.iloc[positions].reset_index(drop=True)
+
+
+def measure(call, rows: int, min_repeat: int, max_repeat: int, budget: float) -> dict:
+    """Time call() repeatedly (after one warm-up) within a time budget, then trace one call's memory."""
+    call()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_repeat and (len(latencies) < min_repeat or time.perf_counter() - started < budget):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {
+        "repeats": len(latencies),
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "rows_per_sec": round(rows / (p50 / 1000), 1),
+        "peak_mb": round(peak / (1024 * 1024), 3),
+    }
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "model_version": registry.version(),
+    }
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    """Cases (present in both runs) whose p50 latency exceeds the baseline by more than threshold."""
+    with open(baseline_path, "r") as f:
+        baseline = {(r["case"], r["rows"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nComparison with {baseline_path} (threshold +{threshold:.0%} on p50)")
+    for result in results:
+        previous = baseline.get((result["case"], result["rows"]))
+        if previous is None:
+            continue
+        change = result["p50_ms"] / previous["p50_ms"] - 1 if previous["p50_ms"] else 0.0
+        regressed = change > threshold
+        if regressed:
+            regressions.append({**result, "baseline_p50_ms": previous["p50_ms"], "change": round(change, 4)})
+        print(f"  {result['case']:<24} {result['rows']:>9,}  {previous['p50_ms']:>11.3f} -> {result['p50_ms']:>11.3f} ms"
+              f"  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scoring hot paths at increasing batch sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Batch sizes in rows.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--min-repeat", type=int, default=3, help="Timed calls per case, at least.")
+    parser.add_argument("--max-repeat", type=int, default=100, help="Timed calls per case, at most.")
+    parser.add_argument("--budget", type=float, default=2.0, help="Seconds of timed calls per case (after min-repeat).")
+    parser.add_argument("--output", default=None,
+                        help="JSON results file (default: benchmarks/results/bench-<timestamp>.json).")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed relative p50 slowdown before a case counts as a regression.")
+    args = parser.parse_args()
+
+    # Model loading is not part of any measurement
+    registry.preload(CHURN_ARTIFACTS + list(SEGMENTATION_ARTIFACTS.values()))
+    sample = read_customers_csv(DATA_PATH)
+
+    print(f"{'case':<24} {'rows':>9}  {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10}  {'rows/s':>12}  {'peak MB':>8}")
+    results = []
+    for rows in args.sizes:
+        df = make_batch(sample, rows)
+        for case in args.cases:
+            result = {"case": case, "rows": rows,
+                      **measure(CASES[case](df), rows, args.min_repeat, args.max_repeat, args.budget)}
+            results.append(result)
+            print(f"{case:<24} {rows:>9,}  {result['p50_ms']:>10.3f} {result['p90_ms']:>10.3f} "
+                  f"{result['p99_ms']:>10.3f}  {result['rows_per_sec']:>12,.0f}  {result['peak_mb']:>8.1f}")
+
+    run = {"environment": {**environment(), "peak_rss_mb": peak_rss_mb()}, "results": results}
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above +{args.threshold:.0%}")
+            sys.exit(1)
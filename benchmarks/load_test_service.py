@@ -0,0 +1,182 @@
+# load_test_service.py
+"""
+Load test for the HTTP scoring service under concurrency.
+
+    python benchmarks/load_test_service.py --concurrency 64 --requests 5000
+    python benchmarks/load_test_service.py --max-batch-size 1          # micro-batching off
+    python benchmarks/load_test_service.py --bulk-size 500 --requests 200
+    python benchmarks/load_test_service.py --url http://127.0.0.1:8000 --concurrency 32
+
+Without --url the ASGI app is driven in-process (no server or HTTP stack),
+which isolates the batching and model cost. With --url, requests go over
+keep-alive HTTP/1.1 connections to a running service, one per worker.
+Profiles are resampled from the raw dataset.
+"""
+import os
+import sys
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "streamlit_app"))
+
+from prediction import INPUT_COLUMNS
+from schema import read_customers_csv
+from metrics import metrics
+from service import ScoringService
+
+DATA_PATH = os.path.join(BENCH_DIR, "..", "data", "raw", "netflix_customer_churn.csv")
+
+
+def make_payloads(count: int, bulk_size: int, seed: int = 42) -> list:
+    """count request bodies: single profiles, or {"customers": [...]} of bulk_size profiles."""
+    sample = read_customers_csv(DATA_PATH)[INPUT_COLUMNS]
+    records = json.loads(sample.to_json(orient="records"))
+    positions = np.random.default_rng(seed).integers(0, len(records), (count, bulk_size))
+    if bulk_size == 1:
+        return [json.dumps(records[row[0]]).encode() for row in positions]
+    return [json.dumps({"customers": [records[i] for i in row]}).encode() for row in positions]
+
+
+# --- Transports: async send(body) -> (status, response bytes) ---
+class InProcessClient:
+    """Calls the ASGI app directly."""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+
+    async def send(self, body: bytes):
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        response = {}
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            else:
+                response["body"] = message.get("body", b"")
+
+        scope = {"type": "http", "method": "POST", "path": self.path, "headers": []}
+        await self.app(scope, receive, send)
+        return response["status"], response["body"]
+
+    async def close(self):
+        pass
+
+
+class HTTPClient:
+    """One keep-alive HTTP/1.1 connection (enough for the service's fixed-length JSON responses)."""
+
+    def __init__(self, url: str, path: str):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = path
+        self.reader = self.writer = None
+
+    async def send(self, body: bytes):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+async def run(make_client, payloads: list, concurrency: int) -> dict:
+    """Send every payload from concurrency workers; per-request latencies and the wall time."""
+    queue = list(reversed(payloads))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        client = make_client()
+        try:
+            while queue:
+                body = queue.pop()
+                start = time.perf_counter()
+                status, _ = await client.send(body)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"latencies": np.array(latencies), "errors": errors, "elapsed": time.perf_counter() - started}
+
+
+async def main(args) -> dict:
+    path = "/score" if args.bulk_size == 1 else "/score/batch"
+    payloads = make_payloads(args.requests + args.warmup, args.bulk_size)
+
+    if args.url:
+        make_client = lambda: HTTPClient(args.url, path)
+        await run(make_client, payloads[:args.warmup], min(args.concurrency, args.warmup) or 1)
+        return await run(make_client, payloads[args.warmup:], args.concurrency)
+
+    app = ScoringService(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms, churn_engine=args.engine)
+    await app.startup()
+    try:
+        make_client = lambda: InProcessClient(app, path)
+        await run(make_client, payloads[:args.warmup], min(args.concurrency, args.warmup) or 1)
+        metrics.reset()
+        result = await run(make_client, payloads[args.warmup:], args.concurrency)
+    finally:
+        await app.shutdown()
+    batches = metrics.snapshot()["stages"].get("service.batch")
+    if batches:
+        result["mean_batch_size"] = batches["rows"] / batches["count"]
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the scoring service under concurrency.")
+    parser.add_argument("--url", default=None, help="Base URL of a running service (default: in-process).")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at once.")
+    parser.add_argument("--requests", type=int, default=5000, help="Timed requests in total.")
+    parser.add_argument("--warmup", type=int, default=200, help="Untimed requests sent first.")
+    parser.add_argument("--bulk-size", type=int, default=1,
+                        help="Customers per request; above 1 the bulk endpoint is used.")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="In-process service setting.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="In-process service setting.")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], default="sklearn",
+                        help="In-process service setting.")
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args))
+    latencies_ms = result["latencies"] * 1000
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    requests_per_sec = len(latencies_ms) / result["elapsed"]
+
+    target = args.url or (f"in-process (max batch {args.max_batch_size}, max wait {args.max_wait_ms:g} ms, "
+                          f"{args.engine})")
+    print(f"Target:       {target}")
+    print(f"Requests:     {len(latencies_ms):,} x {args.bulk_size} customer(s), concurrency {args.concurrency}, "
+          f"{result['errors']} error(s)")
+    print(f"Latency:      p50 {p50:.2f} ms   p90 {p90:.2f} ms   p99 {p99:.2f} ms   max {latencies_ms.max():.2f} ms")
+    print(f"Throughput:   {requests_per_sec:,.0f} req/s   {requests_per_sec * args.bulk_size:,.0f} customers/s")
+    if "mean_batch_size" in result:
+        print(f"Model calls:  {result['mean_batch_size']:.1f} customers per call on average")
@@ -2,15 +2,23 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import joblib
 import os
+import tempfile
 import numpy as np
 
-from segmentation import assign_cluster
-from prediction import predict_churn
-from recommendation import recommend_offer
+from prediction import CHURN_ARTIFACTS
+from segmentation import SEGMENTATION_ARTIFACTS, get_segment_labels
+from model_registry import registry
+from caching import ResultCache, AnalysisMemo, batch_cache_key
+from pipeline import ScoringPipeline, normalize_profile, profile_key
+from parallel import ParallelScorer
+from schema import apply_output_schema
+from batch_io import INPUT_EXTENSIONS, file_format, read_customers
 from business_problem import show_business_problem
-from batch_results import show_batch_results
+from batch_results import show_batch_results, get_batch_index
+from batch_index import risk_levels
+from charts import render_batch_charts, feature_importance_chart, figure_png
+from metrics import metrics
 # --- Streamlit Page Config ---
 st.set_page_config(
     page_title="Netflix Customer Insights", 
@@ -205,14 +213,76 @@ plt.rcParams['grid.color'] = '#333333'
 plt.rcParams['font.size'] = 9
 plt.rcParams['figure.figsize'] = [6, 4]
 
-# --- Load Model ---
+# --- Load Models ---
+@st.cache_resource
+def load_models():
+    # Loads every artifact once per server process; later sessions reuse the registry
+    registry.preload(CHURN_ARTIFACTS + list(SEGMENTATION_ARTIFACTS.values()))
+    return registry
+
 try:
-    model_path = os.path.join(os.path.dirname(__file__), "..", "models", "gb_churn_model.joblib")
-    model = joblib.load(model_path)
-except FileNotFoundError:
-    st.error("Model not found. Ensure 'gb_churn_model.joblib' exists in 'models' directory.")
+    model_registry = load_models()
+    # Pick up retrained artifacts before anything reads them in this run
+    model_registry.refresh()
+except FileNotFoundError as e:
+    st.error(f"Model not found. Ensure all artifacts exist in the 'models' directory ({e.filename}).")
     st.stop()
 
+with st.sidebar:
+    with st.expander("⏱️ Model load times"):
+        st.code(model_registry.report())
+
+scoring_pipeline = ScoringPipeline()
+
+def analyze_profile(profile: dict) -> dict:
+    # Memo misses only; each computed analysis becomes the "last run" in diagnostics
+    metrics.begin_run("single customer analysis")
+    return scoring_pipeline.analyze(profile)
+
+# Uploads at least this large are scored across all cores
+PARALLEL_MIN_ROWS = 200_000
+
+@st.cache_resource
+def get_parallel_scorer():
+    # One process pool per Streamlit server, reused across sessions and reruns
+    return ParallelScorer()
+
+@st.cache_resource
+def get_result_cache():
+    # Shared by all sessions; budget and optional disk tier come from the environment
+    max_mb = int(os.environ.get("BATCH_CACHE_MAX_MB", "512"))
+    return ResultCache(max_bytes=max_mb * 1024 * 1024, disk_dir=os.environ.get("BATCH_CACHE_DIR"))
+
+@st.cache_resource
+def get_analysis_memo():
+    # Shared by all sessions; when the model artifacts change, the models are reloaded and the memo cleared
+    return AnalysisMemo(max_entries=int(os.environ.get("ANALYSIS_MEMO_SIZE", "1024")),
+                        version_fn=model_registry.refresh)
+
+def get_batch_key(uploaded_file) -> str:
+    # Hash each upload once per session and model version; refresh() reloads retrained models first,
+    # so the key always names the models that will score the batch
+    model_version = model_registry.refresh()
+    keys = st.session_state.setdefault("batch_keys", {})
+    if (uploaded_file.file_id, model_version) not in keys:
+        # A view of the upload's buffer, so large files are hashed without a second in-memory copy
+        with uploaded_file.getbuffer() as data:
+            keys[uploaded_file.file_id, model_version] = batch_cache_key(data, model_version)
+    return keys[uploaded_file.file_id, model_version]
+
+# Largest streamed result offered as a browser download
+STREAM_DOWNLOAD_LIMIT_BYTES = 200 * 1024 * 1024
+
+@st.cache_data(max_entries=16, show_spinner="Rendering charts...")
+def get_batch_charts(batch_key, _df):
+    # Aggregated and rendered once per processed batch; the DataFrame itself is not hashed
+    return render_batch_charts(_df, seed=int(batch_key[:16], 16))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_feature_importance_chart(model_version):
+    # Depends only on the churn model, so it is shared by every batch
+    return figure_png(feature_importance_chart(model_registry.get("gb_churn_model.joblib")))
+
 # --- Enhanced Header with Netflix Logo ---
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
@@ -229,17 +299,8 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
 
-# --- Cluster Insights ---
-cluster_insights = {
-    0: {"title": "Inactive Premium Tablet Users",
-        "description": "Dormant Premium users with low engagement. High churn risk."},
-    1: {"title": "Active Premium Mobile Users", 
-        "description": "Highly engaged Premium users on mobile devices."},
-    2: {"title": "Power Basic Desktop Users",
-        "description": "Active Basic users with high watch hours."},
-    3: {"title": "Semi-active Premium Laptop Users",
-        "description": "Moderate engagement with long gaps between sessions."}
-}
+# --- Cluster Insights (segment titles saved with the KMeans model, models/segments.json) ---
+cluster_insights = get_segment_labels()
 
 # --- Main Content with Enhanced Tabs ---
 tab1, tab2, tab3 = st.tabs(["🎯 SINGLE ANALYSIS", "📊 BATCH ANALYSIS", "💼 BUSINESS PROBLEM"])
@@ -280,18 +341,21 @@ with tab1:
         analyze_clicked = st.button("🚀 **ANALYZE CUSTOMER**", use_container_width=True, type="primary")
     
     if analyze_clicked:
-        user_input = pd.DataFrame([[age, gender, subscription_type, watch_hours, last_login_days,
-                                    region, device, payment_method, number_of_profiles,
-                                    avg_watch_time_per_day, favorite_genre]],
-                                columns=["age","gender","subscription_type","watch_hours","last_login_days",
-                                         "region","device","payment_method","number_of_profiles",
-                                         "avg_watch_time_per_day","favorite_genre"])
+        # Normalized once: the memo key and the analysis both use this copy
+        profile = normalize_profile({
+            "age": age, "gender": gender, "subscription_type": subscription_type,
+            "watch_hours": watch_hours, "last_login_days": last_login_days, "region": region,
+            "device": device, "payment_method": payment_method, "number_of_profiles": number_of_profiles,
+            "avg_watch_time_per_day": avg_watch_time_per_day, "favorite_genre": favorite_genre})
         try:
+            analysis_memo = get_analysis_memo()
+            analysis = analysis_memo.get_or_compute(profile_key(profile), lambda: analyze_profile(profile))
+            
             # Results in columns
             col1, col2 = st.columns(2)
             
             with col1:
-                cluster_label = assign_cluster(user_input)
+                cluster_label = analysis['segment']
                 insight = cluster_insights.get(cluster_label, {"title": "Unknown", "description": "No info."})
                 st.markdown(f"""
                 <div class='info-message'>
@@ -302,27 +366,29 @@ with tab1:
                 """, unsafe_allow_html=True)
 
             with col2:
-                churn_result = predict_churn(user_input)
-                churn_text = "HIGH CHURN RISK" if churn_result['predicted_class'] == 1 else "LOW CHURN RISK"
-                color = "#E50914" if churn_result['predicted_class'] == 1 else "#1DB954"
-                icon = "⚠️" if churn_result['predicted_class'] == 1 else "✅"
+                churn_text = "HIGH CHURN RISK" if analysis['predicted_class'] == 1 else "LOW CHURN RISK"
+                color = "#E50914" if analysis['predicted_class'] == 1 else "#1DB954"
+                icon = "⚠️" if analysis['predicted_class'] == 1 else "✅"
                 st.markdown(f"""
                 <div class='success-message' style='border-color: {color};'>
                     <h4 style='color: {color}; margin-bottom: 12px;'>📊 CHURN PREDICTION</h4>
                     <p style='font-weight: 700; font-size: 1.2rem; color: {color}; margin-bottom: 8px;'>{icon} {churn_text}</p>
-                    <p style='color: #CCC; font-size: 1.1rem;'>Probability: <strong>{churn_result['churn_probability']}%</strong></p>
+                    <p style='color: #CCC; font-size: 1.1rem;'>Probability: <strong>{analysis['churn_probability']}%</strong></p>
                 </div>
                 """, unsafe_allow_html=True)
 
             # Recommendation
-            recommendation = recommend_offer(cluster_label, churn_result['churn_probability'], subscription_type)
             st.markdown(f"""
             <div class='section-card'>
                 <h4 style='color: #E50914; margin-bottom: 12px;'>🎁 RECOMMENDED ACTION</h4>
-                <p style='font-size: 1.1rem; font-weight: 500;'>{recommendation}</p>
+                <p style='font-size: 1.1rem; font-weight: 500;'>{analysis['recommendation']}</p>
             </div>
             """, unsafe_allow_html=True)
             
+            memo_stats = analysis_memo.stats()
+            st.caption(f"Analysis cache: {memo_stats['hits']} hits • {memo_stats['misses']} misses • "
+                       f"{memo_stats['entries']}/{memo_stats['max_entries']} profiles")
+            
         except Exception as e:
             st.error(f"Analysis error: {e}")
 
@@ -333,81 +399,158 @@ with tab2:
     st.markdown("""
     <div class='section-card'>
         <h4 style='color: #E50914; margin-bottom: 15px;'>📁 UPLOAD CUSTOMER DATA</h4>
-        <p style='color: #CCC; margin-bottom: 15px;'>Upload a CSV file containing customer data for batch analysis and insights</p>
+        <p style='color: #CCC; margin-bottom: 15px;'>Upload a CSV, Parquet or Arrow file containing customer data for batch analysis and insights</p>
     </div>
     """, unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader("Choose CSV file", type=["csv"], label_visibility="collapsed", key="batch_uploader")
+    uploaded_file = st.file_uploader("Choose customer file", type=INPUT_EXTENSIONS, label_visibility="collapsed", key="batch_uploader")
+    
+    stream_col1, stream_col2 = st.columns([2, 1])
+    with stream_col1:
+        streaming_mode = st.checkbox(
+            "⚡ Streaming mode for very large files (scores in chunks and writes results to disk)",
+            key="batch_streaming"
+        )
+    with stream_col2:
+        stream_chunksize = st.number_input("Rows per chunk", 10_000, 1_000_000, 100_000, step=10_000,
+                                           key="batch_chunksize", disabled=not streaming_mode)
+    
+    if uploaded_file and streaming_mode and file_format(uploaded_file.name) != "csv":
+        st.info("Streaming mode reads CSV files; this file is processed in memory instead.")
+        streaming_mode = False
     
-    if uploaded_file:
-        df = pd.read_csv(uploaded_file)
+    if uploaded_file and streaming_mode:
+        # Results go straight to disk; the in-memory dashboard is not used
+        st.session_state.pop('processed_batch_data', None)
+        st.session_state.pop('processed_batch_key', None)
+        batch_key = get_batch_key(uploaded_file)
+        output_path = os.path.join(tempfile.gettempdir(), f"netflix_scored_{batch_key}.csv")
+        stream_summaries = st.session_state.setdefault("stream_summaries", {})
+        
+        if batch_key in stream_summaries and os.path.exists(output_path):
+            summary = stream_summaries[batch_key]
+        else:
+            metrics.begin_run(f"streamed upload {uploaded_file.name}")
+            with st.spinner('🔄 Streaming customer data...'):
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                def report_progress(fraction, rows_done):
+                    progress_bar.progress(fraction)
+                    status_text.text(f"🔍 Scored {rows_done:,} customers ({fraction:.0%} of file)...")
+                
+                uploaded_file.seek(0)
+                summary = scoring_pipeline.score_stream(uploaded_file, output_path, chunksize=int(stream_chunksize),
+                                                        on_progress=report_progress)
+                stream_summaries[batch_key] = summary
+                progress_bar.progress(1.0)
+                status_text.text("✅ Analysis complete!")
+        
+        metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+        with metric_col1:
+            st.metric("Total Customers", f"{summary['rows']:,}")
+        with metric_col2:
+            st.metric("High Risk", f"{summary['high_risk']:,}")
+        with metric_col3:
+            st.metric("Medium Risk", f"{summary['medium_risk']:,}")
+        with metric_col4:
+            st.metric("Avg Churn Prob", f"{summary['avg_churn_prob']:.1f}%")
+        
+        if summary['preview'] is not None:
+            with st.expander("📋 Scored Data Preview", expanded=True):
+                st.dataframe(summary['preview'], use_container_width=True)
+        
+        # Serving the file through the browser loads it into memory, so only offer it for moderate sizes
+        output_size = os.path.getsize(output_path)
+        if output_size <= STREAM_DOWNLOAD_LIMIT_BYTES:
+            with open(output_path, "rb") as f:
+                st.download_button(
+                    label="📥 Download Full Analysis",
+                    data=f,
+                    file_name="netflix_complete_analysis.csv",
+                    mime="text/csv",
+                    use_container_width=True
+                )
+        else:
+            st.info(f"Results ({output_size / 1e9:.1f} GB) were written to `{output_path}` on the server.")
+    
+    elif uploaded_file:
+        batch_key = get_batch_key(uploaded_file)
+        result_cache = get_result_cache()
+        df = result_cache.get(batch_key)
+        from_cache = df is not None
+        
+        if not from_cache:
+            metrics.begin_run(f"upload {uploaded_file.name}")
+            df = read_customers(uploaded_file, uploaded_file.name)
+            # Remembered with the cached result, which also holds the added prediction columns
+            df.attrs['input_columns'] = list(df.columns)
+        original_columns = df.attrs.get('input_columns', list(df.columns))
         
         st.markdown(f"""
         <div class='success-message'>
             <h4 style='color: #1DB954; margin-bottom: 8px;'>✅ FILE UPLOADED SUCCESSFULLY</h4>
-            <p style='color: #CCC; margin: 0;'><strong>{len(df)}</strong> customer records loaded • <strong>{len(df.columns)}</strong> columns detected</p>
+            <p style='color: #CCC; margin: 0;'><strong>{len(df)}</strong> customer records loaded • <strong>{len(original_columns)}</strong> columns detected</p>
         </div>
         """, unsafe_allow_html=True)
         
         # Show data preview
         with st.expander("📋 Original Data Preview", expanded=True):
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(df[original_columns].head(), use_container_width=True)
         
-        # Process data automatically
-        cols = ["age", "gender", "subscription_type", "watch_hours", "last_login_days",
-                "region", "device", "payment_method", "number_of_profiles",
-                "avg_watch_time_per_day", "favorite_genre"]
-
-        def single_row_df(row):
-            return pd.DataFrame([row[cols].tolist()], columns=cols)
-
-        # Progress with enhanced styling
-        with st.spinner('🔄 Processing customer data...'):
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            status_text.text("🔍 Analyzing customer segments...")
-            df['segment'] = df.apply(lambda row: assign_cluster(single_row_df(row)), axis=1)
-            progress_bar.progress(0.33)
-            
-            status_text.text("📈 Calculating churn probabilities...")
-            df['churn_prob'] = df.apply(lambda row: predict_churn(single_row_df(row))['churn_probability'], axis=1)
-            progress_bar.progress(0.66)
+        if not from_cache:
+            # Process data automatically, with enhanced progress styling
+            with st.spinner('🔄 Processing customer data...'):
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                status_text.text("🔍 Analyzing segments, churn risk and recommendations...")
+                if len(df) >= PARALLEL_MIN_ROWS:
+                    scores = get_parallel_scorer().score(df)
+                else:
+                    scores = scoring_pipeline.score(df)
+                for col in ScoringPipeline.output_columns:
+                    df[col] = scores[col]
+                progress_bar.progress(1.0)
+                
+                status_text.text("✅ Analysis complete!")
             
-            status_text.text("🎯 Generating recommendations...")
-            df['recommendation'] = df.apply(lambda row: recommend_offer(row['segment'], row['churn_prob'], row['subscription_type']), axis=1)
-            progress_bar.progress(1.0)
+            with metrics.stage("postprocess", len(df)):
+                # Add revenue calculations
+                if 'monthly_revenue' not in df.columns:
+                    df['monthly_revenue'] = 499
+                df['revenue_loss'] = (df['churn_prob'] / 100) * df['monthly_revenue']
+                
+                # Simulate churn probability after recommendations (seeded by the upload, so reruns agree)
+                rng = np.random.default_rng(int(batch_key[:16], 16))
+                df['churn_prob_after'] = df['churn_prob'] * rng.uniform(0.6, 0.9, len(df))
+                df['risk_level'] = risk_levels(df['churn_prob'])
+                apply_output_schema(df)
             
-            status_text.text("✅ Analysis complete!")
-
+            result_cache.put(batch_key, df)
+        
         # Store processed data in session state
         st.session_state.processed_batch_data = df
-        
-        # Add revenue calculations
-        if 'monthly_revenue' not in df.columns:
-            df['monthly_revenue'] = 499
-        df['revenue_loss'] = (df['churn_prob'] / 100) * df['monthly_revenue']
-        
-        # Simulate churn probability after recommendations
-        df['churn_prob_after'] = df['churn_prob'] * np.random.uniform(0.6, 0.9, len(df))
+        st.session_state.processed_batch_key = batch_key
     
     # Display results if we have processed data
     if 'processed_batch_data' in st.session_state:
         df = st.session_state.processed_batch_data
         
         # 🚀 SHOW BATCH RESULTS WITH TABLE
-        show_batch_results(df)
+        show_batch_results(df, batch_key=st.session_state.get('processed_batch_key'))
         
         # 🎨 ADD ALL THE GRAPHS AFTER THE TABLE
         st.markdown("---")
         st.markdown("#### 📊 Advanced Analytics Dashboard")
         
-        # Enhanced Key Metrics
-        total_users = len(df)
-        high_risk_users = (df['churn_prob'] > 70).sum()
-        medium_risk_users = ((df['churn_prob'] >= 30) & (df['churn_prob'] <= 70)).sum()
-        avg_churn = df['churn_prob'].mean()
-        total_revenue_loss = df['revenue_loss'].sum()
+        # Enhanced Key Metrics (from the batch's aggregate cube)
+        batch_metrics = get_batch_index(st.session_state.get('processed_batch_key') or str(id(df)), df).metrics()
+        total_users = batch_metrics['total']
+        high_risk_users = batch_metrics['risk_counts']["🔴 High"]
+        medium_risk_users = batch_metrics['risk_counts']["🟡 Medium"]
+        avg_churn = batch_metrics['avg_churn_prob']
+        total_revenue_loss = batch_metrics['revenue_loss']
         avg_revenue_per_user = total_revenue_loss / total_users if total_users > 0 else 0
         
         metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
@@ -450,138 +593,72 @@ with tab2:
         st.markdown("---")
         st.markdown("#### 📈 Advanced Visualizations")
         
+        # Charts are cached as images per batch, so reruns do not depend on the row count
+        charts = get_batch_charts(st.session_state.processed_batch_key, df)
+        
         # Row 1: Customer Segments and Churn Analysis
         col1, col2 = st.columns(2)
         
         with col1:
             with st.expander("🎯 CUSTOMER SEGMENTS", expanded=True):
-                fig1, ax1 = plt.subplots(figsize=(6, 4))
-                segment_counts = df['segment'].value_counts().sort_index()
-                colors = ['#E50914', '#1DB954', '#FFD700', '#007BFF']
-                bars = ax1.bar(segment_counts.index.astype(str), segment_counts.values, color=colors, alpha=0.9)
-                ax1.set_xlabel('Segment ID', fontweight=600)
-                ax1.set_ylabel('Number of Customers', fontweight=600)
-                ax1.set_title('Customer Segments Distribution', fontweight=700, pad=15)
-                # Add value labels on bars
-                for bar in bars:
-                    height = bar.get_height()
-                    ax1.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                            f'{int(height)}', ha='center', va='bottom', fontweight=600, color='white')
-                st.pyplot(fig1)
+                st.image(charts["segments"], use_container_width=True)
         
         with col2:
             with st.expander("📊 CHURN ANALYSIS", expanded=True):
-                # Compact churn distribution
-                fig2, ax2 = plt.subplots(figsize=(6, 4))
-                n, bins, patches = ax2.hist(df['churn_prob'], bins=8, color='#E50914', alpha=0.8, edgecolor='white', linewidth=1)
-                ax2.set_xlabel('Churn Probability (%)', fontweight=600)
-                ax2.set_ylabel('Number of Customers', fontweight=600)
-                ax2.set_title('Churn Distribution', fontweight=700, pad=12)
-                st.pyplot(fig2)
+                st.image(charts["churn"], use_container_width=True)
 
         # Row 2: Feature Importance and Before/After Recommendations
         col1, col2 = st.columns(2)
         
         with col1:
             with st.expander("🔍 FEATURE IMPORTANCE", expanded=True):
-                fig3, ax3 = plt.subplots(figsize=(6, 4))
-                feature_names = ["Age", "Gender", "Subscription", "Watch Hours", "Last Login",
-                                "Region", "Device", "Payment", "Profiles", "Avg Watch", "Genre"]
-                
-                if hasattr(model, 'feature_importances_'):
-                    importances = model.feature_importances_
-                elif 'classifier' in model and hasattr(model['classifier'], 'feature_importances_'):
-                    importances = model['classifier'].feature_importances_
-                else:
-                    importances = np.ones(len(feature_names)) / len(feature_names)
-
-                importances = importances[:len(feature_names)]
-                indices = np.argsort(importances)
-                
-                bars = ax3.barh(np.array(feature_names)[indices], importances[indices], 
-                               color='#E50914', alpha=0.8)
-                
-                # Add value labels
-                for i, (bar, importance) in enumerate(zip(bars, importances[indices])):
-                    ax3.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2.,
-                            f'{importance:.3f}', ha='left', va='center', fontweight=600, color='white', fontsize=8)
-                
-                ax3.set_xlabel('Importance Score', fontweight=600)
-                ax3.set_title('Feature Importance for Churn Prediction', fontweight=700, pad=12)
-                ax3.grid(True, alpha=0.3)
-                st.pyplot(fig3)
+                st.image(get_feature_importance_chart(model_registry.refresh()), use_container_width=True)
         
         with col2:
             with st.expander("🔄 BEFORE/AFTER RECOMMENDATIONS", expanded=True):
-                fig4, ax4 = plt.subplots(figsize=(6, 4))
-                
-                # Sample data for before/after comparison
-                sample_size = min(50, len(df))
-                sample_indices = np.random.choice(len(df), sample_size, replace=False)
-                before_probs = df.iloc[sample_indices]['churn_prob'].values
-                after_probs = df.iloc[sample_indices]['churn_prob_after'].values
-                
-                x = np.arange(sample_size)
-                width = 0.35
-                
-                bars1 = ax4.bar(x - width/2, before_probs, width, label='Before', color='#E50914', alpha=0.8)
-                bars2 = ax4.bar(x + width/2, after_probs, width, label='After', color='#1DB954', alpha=0.8)
-                
-                ax4.set_xlabel('Customer Sample', fontweight=600)
-                ax4.set_ylabel('Churn Probability (%)', fontweight=600)
-                ax4.set_title('Churn Probability: Before vs After Recommendations', fontweight=700, pad=12)
-                ax4.legend(facecolor='#141414')
-                ax4.set_xticks([])  # Remove x-axis ticks for cleaner look
-                
-                # Add average improvement text
-                avg_improvement = ((before_probs - after_probs) / before_probs * 100).mean()
-                ax4.text(0.02, 0.98, f'Avg Improvement: {avg_improvement:.1f}%', 
-                        transform=ax4.transAxes, fontweight=600, color='#1DB954',
-                        bbox=dict(boxstyle="round,pad=0.3", facecolor='#141414', alpha=0.8))
-                
-                st.pyplot(fig4)
+                st.image(charts["before_after"], use_container_width=True)
 
         # Row 3: Revenue Impact and Risk Categories
         col1, col2 = st.columns(2)
         
         with col1:
             with st.expander("💸 REVENUE IMPACT", expanded=True):
-                fig5, ax5 = plt.subplots(figsize=(6, 4))
-                revenue_by_segment = df.groupby('segment')['revenue_loss'].sum()
-                colors = ['#E50914', '#1DB954', '#FFD700', '#007BFF']
-                bars = ax5.bar(revenue_by_segment.index.astype(str), revenue_by_segment.values, 
-                              color=colors, alpha=0.9)
-                ax5.set_xlabel('Segment ID', fontweight=600)
-                ax5.set_ylabel('Revenue at Risk (₹)', fontweight=600)
-                ax5.set_title('Revenue Impact by Segment', fontweight=700, pad=12)
-                
-                # Add value labels on bars
-                for bar in bars:
-                    height = bar.get_height()
-                    ax5.text(bar.get_x() + bar.get_width()/2., height + 1000,
-                            f'₹{height:,.0f}', ha='center', va='bottom', fontweight=600, color='white', fontsize=9)
-                
-                st.pyplot(fig5)
+                st.image(charts["revenue"], use_container_width=True)
         
         with col2:
             with st.expander("⚠️ RISK CATEGORIES", expanded=True):
-                # Risk categories pie chart
-                low_risk = (df['churn_prob'] < 30).sum()
-                medium_risk = ((df['churn_prob'] >= 30) & (df['churn_prob'] <= 70)).sum()
-                high_risk = (df['churn_prob'] > 70).sum()
-                
-                fig6, ax6 = plt.subplots(figsize=(6, 4))
-                sizes = [low_risk, medium_risk, high_risk]
-                colors_pie = ['#1DB954', '#FFD700', '#E50914']
-                labels = [f'Low Risk\n({low_risk})', f'Medium Risk\n({medium_risk})', f'High Risk\n({high_risk})']
-                
-                wedges, texts, autotexts = ax6.pie(sizes, labels=labels, colors=colors_pie, autopct='%1.1f%%',
-                                                  startangle=90, textprops={'color': 'white', 'fontweight': '600'})
-                
-                # Enhance the autopct text
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontweight('600')
-                
-                ax6.set_title('Customer Risk Distribution', fontweight=700, pad=20, color='white')
-                st.pyplot(fig6)
\ No newline at end of file
+                st.image(charts["risk"], use_container_width=True)
+    
+    # 🩺 Stage breakdown of the last scoring run in this server process
+    with st.expander("🩺 Pipeline diagnostics"):
+        if not metrics.enabled:
+            st.info("Instrumentation is disabled (SCORING_METRICS=0).")
+        else:
+            last_run = metrics.last_run()
+            if last_run["stages"]:
+                total_seconds = sum(stage["seconds"] for stage in last_run["stages"].values())
+                st.caption(f"Last run: {last_run['label'] or 'n/a'} • {total_seconds:.3f}s in instrumented stages")
+                st.dataframe(pd.DataFrame([
+                    {"Stage": name, "Seconds": stage["seconds"],
+                     "Share %": stage["seconds"] / total_seconds * 100 if total_seconds else 0.0,
+                     "Rows": stage["rows"], "Calls": stage["calls"],
+                     "Rows/sec": stage["rows"] / stage["seconds"] if stage["seconds"] else None}
+                    for name, stage in last_run["stages"].items()
+                ]), use_container_width=True, hide_index=True)
+            else:
+                st.caption("No scoring run recorded yet.")
+            
+            snapshot = metrics.snapshot()
+            if snapshot["counters"]:
+                st.dataframe(pd.DataFrame([
+                    {"Counter": counter["name"], **counter["labels"], "Value": counter["value"]}
+                    for counter in snapshot["counters"]
+                ]), use_container_width=True, hide_index=True)
+            
+            export_col1, export_col2 = st.columns(2)
+            with export_col1:
+                st.download_button("📥 Prometheus metrics", metrics.to_prometheus(), file_name="scoring_metrics.prom",
+                                   mime="text/plain", use_container_width=True)
+            with export_col2:
+                st.download_button("📥 JSON metrics", metrics.to_json(), file_name="scoring_metrics.json",
+                                   mime="application/json", use_container_width=True)
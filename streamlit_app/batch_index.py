@@ -0,0 +1,119 @@
+# batch_index.py
+import numpy as np
+import pandas as pd
+
+# --- Risk bands used by the batch dashboard ---
+RISK_LEVELS = ["🟢 Low", "🟡 Medium", "🔴 High"]
+LOW, MEDIUM, HIGH = range(3)
+
+
+def risk_codes(churn_prob) -> np.ndarray:
+    """Risk band per row: Low below 30%, Medium from 30% to 70%, High above 70%."""
+    churn_prob = np.asarray(churn_prob)
+    return np.select([churn_prob > 70, churn_prob >= 30], [HIGH, MEDIUM], default=LOW).astype(np.int8)
+
+
+def risk_levels(churn_prob) -> pd.Categorical:
+    return pd.Categorical.from_codes(risk_codes(churn_prob), categories=RISK_LEVELS)
+
+
+def _codes(column: pd.Series):
+    """Dense int codes and labels for a column; missing values get their own trailing code."""
+    categorical = pd.Categorical(column)
+    codes = categorical.codes.astype(np.int64)
+    labels = list(categorical.categories)
+    if (codes < 0).any():
+        codes[codes < 0] = len(labels)
+        labels.append(None)
+    return codes, labels
+
+
+class BatchIndex:
+    """
+    Filter index and aggregate cube for a scored batch.
+    Rows are grouped by (risk band, segment, subscription type). The cube
+    holds row counts, churn probability sums and revenue loss sums per cell,
+    split further by recommendation, so dashboard metrics never scan the rows. Row positions
+    are stored sorted by cell, so a filter selects whole cells and costs
+    O(selected rows) instead of a boolean pass over the frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        if 'risk_level' in df.columns:
+            risk = df['risk_level'].cat.codes.to_numpy().astype(np.int64)
+        else:
+            risk = risk_codes(df['churn_prob']).astype(np.int64)
+        segment, self.segments = _codes(df['segment'])
+        subscription, self.subscriptions = _codes(df['subscription_type'])
+        recommendation, self.recommendations = _codes(df['recommendation'])
+
+        self.shape = (len(RISK_LEVELS), len(self.segments), len(self.subscriptions))
+        cell = np.ravel_multi_index((risk, segment, subscription), self.shape)
+        cube_cell = cell * len(self.recommendations) + recommendation
+        cube_shape = self.shape + (len(self.recommendations),)
+        cube_size = int(np.prod(cube_shape))
+
+        churn_prob = df['churn_prob'].to_numpy(dtype=np.float64)
+        self.counts = np.bincount(cube_cell, minlength=cube_size).reshape(cube_shape)
+        self.churn_sums = np.bincount(cube_cell, weights=churn_prob, minlength=cube_size).reshape(cube_shape)
+        # Batches scored without revenue figures count as no revenue at risk
+        revenue_loss = (df['revenue_loss'].to_numpy(dtype=np.float64) if 'revenue_loss' in df.columns
+                        else np.zeros(self.size))
+        self.revenue_loss_sums = np.bincount(cube_cell, weights=revenue_loss, minlength=cube_size).reshape(cube_shape)
+
+        # Row positions grouped by cell (original order within a cell)
+        self.positions = np.argsort(cell, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts.sum(axis=3).ravel())])
+
+        # Descending sort orders, computed on first use per sort column
+        self._orders = {}
+
+    def _axes(self, risk=None, segment=None, subscription=None):
+        """Selected indices along the risk, segment and subscription axes; None selects all."""
+        def axis(value, labels):
+            if value is None:
+                return np.arange(len(labels))
+            return np.flatnonzero([label == value for label in labels])
+        return (np.arange(len(RISK_LEVELS)) if risk is None else np.array([risk]),
+                axis(segment, self.segments),
+                axis(subscription, self.subscriptions))
+
+    def select(self, risk=None, segment=None, subscription=None) -> np.ndarray:
+        """Positions (in original row order) of the rows matching the filter."""
+        if risk is None and segment is None and subscription is None:
+            return np.arange(self.size)
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[np.ix_(*self._axes(risk, segment, subscription))] = True
+        chunks = [self.positions[self.offsets[c]:self.offsets[c + 1]] for c in np.flatnonzero(mask)]
+        return np.sort(np.concatenate(chunks)) if chunks else np.empty(0, dtype=np.int64)
+
+    def metrics(self, risk=None, segment=None, subscription=None) -> dict:
+        """Row count per risk band, mean churn probability, revenue loss and per-offer counts for a filter."""
+        axes = self._axes(risk, segment, subscription)
+        counts = self.counts[np.ix_(*axes)]
+        total = int(counts.sum())
+        risk_counts = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+        risk_counts[axes[0]] = counts.sum(axis=(1, 2, 3))
+        return {
+            "total": total,
+            "risk_counts": dict(zip(RISK_LEVELS, risk_counts.tolist())),
+            "avg_churn_prob": float(self.churn_sums[np.ix_(*axes)].sum() / total) if total else 0.0,
+            "revenue_loss": float(self.revenue_loss_sums[np.ix_(*axes)].sum()),
+            "recommendation_counts": dict(zip(self.recommendations, counts.sum(axis=(0, 1, 2)).tolist())),
+        }
+
+    def sort(self, positions: np.ndarray, name: str, values) -> np.ndarray:
+        """
+        positions reordered by values (descending, ties in row order). The
+        full-batch order for name is computed once, so later calls only
+        filter it down to the selected rows.
+        """
+        if name not in self._orders:
+            self._orders[name] = np.argsort(-np.asarray(values, dtype=np.float64), kind="stable")
+        order = self._orders[name]
+        if len(positions) == self.size:
+            return order
+        selected = np.zeros(self.size, dtype=bool)
+        selected[positions] = True
+        return order[selected[order]]
@@ -0,0 +1,70 @@
+# batch_io.py
+import importlib.util
+import io
+import os
+
+import pandas as pd
+
+from schema import read_customers_csv, apply_input_schema
+from metrics import metrics
+
+# Parquet and Arrow IPC go through pyarrow (installed alongside Streamlit)
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+INPUT_EXTENSIONS = ["csv", "parquet", "arrow", "feather", "ipc"]
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def file_format(filename: str) -> str:
+    """'csv', 'parquet' or 'arrow', from a file name's extension."""
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension == "parquet":
+        return "parquet"
+    if extension in ("arrow", "feather", "ipc"):
+        return "arrow"
+    return "csv"
+
+
+def available_export_formats() -> list:
+    return [name for name in EXPORT_FORMATS if name == "CSV" or ARROW_AVAILABLE]
+
+
+def read_customers(source, filename: str = None) -> pd.DataFrame:
+    """
+    Read a customer file (CSV, Parquet or Arrow IPC) into the compact input schema.
+    source is a path or a file object; filename decides the format when given.
+    """
+    fmt = file_format(filename or str(source))
+    with metrics.stage("parse") as stage:
+        if fmt == "parquet":
+            df = apply_input_schema(pd.read_parquet(source))
+        elif fmt == "arrow":
+            df = apply_input_schema(pd.read_feather(source))
+        else:
+            df = read_customers_csv(source)
+        stage.rows = len(df)
+    return df
+
+
+def write_results(df: pd.DataFrame, target, fmt: str):
+    """Write df to a path or binary file object in one of EXPORT_FORMATS."""
+    with metrics.stage("write", len(df)):
+        if fmt == "Parquet":
+            df.to_parquet(target, index=False)
+        elif fmt == "Arrow IPC":
+            # Feather v2 is the Arrow IPC file format; it needs a default index
+            df.reset_index(drop=True).to_feather(target)
+        else:
+            df.to_csv(target, index=False)
+
+
+def export_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    write_results(df, buffer, fmt)
+    return buffer.getvalue()
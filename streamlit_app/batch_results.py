@@ -3,7 +3,34 @@ import pandas as pd
 import plotly.express as px
 import numpy as np
 
-def show_batch_results(df):
+from batch_io import EXPORT_FORMATS, available_export_formats, export_bytes
+from batch_index import BatchIndex, HIGH, MEDIUM, LOW, risk_levels
+
+# Risk filter option -> risk band code
+RISK_FILTERS = {"High Risk (>70%)": HIGH, "Medium Risk (30-70%)": MEDIUM, "Low Risk (<30%)": LOW}
+
+# Sort option -> column sorted on (descending)
+SORT_OPTIONS = {
+    "Original order": None,
+    "Churn probability (high → low)": "churn_prob",
+    "Revenue at risk (high → low)": "revenue_loss",
+}
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_batch_index(batch_key, _df):
+    # Built once per processed batch; the DataFrame itself is not hashed
+    return BatchIndex(_df)
+
+
+@st.cache_data(max_entries=16, show_spinner="Preparing export...")
+def _cached_export(batch_key, filter_state, export_format, _df, _positions=None):
+    # Keyed by batch, filters and format; the DataFrame itself is not hashed
+    return export_bytes(_df if _positions is None else _df.iloc[_positions], export_format)
+
+
+def show_batch_results(df, batch_key=None):
     # Netflix-style header
     st.markdown("""
     <div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #000000 0%, #E50914 100%); border-radius: 10px; margin-bottom: 20px;'>
@@ -12,11 +39,15 @@ def show_batch_results(df):
     </div>
     """, unsafe_allow_html=True)
     
-    # Summary metrics
-    total_customers = len(df)
-    high_risk_count = len(df[df['churn_prob'] > 70])
-    medium_risk_count = len(df[(df['churn_prob'] >= 30) & (df['churn_prob'] <= 70)])
-    avg_churn_prob = df['churn_prob'].mean()
+    cache_key = batch_key or str(id(df))
+    index = get_batch_index(cache_key, df)
+    
+    # Summary metrics (from the aggregate cube)
+    summary = index.metrics()
+    total_customers = summary['total']
+    high_risk_count = summary['risk_counts']["🔴 High"]
+    medium_risk_count = summary['risk_counts']["🟡 Medium"]
+    avg_churn_prob = summary['avg_churn_prob']
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -48,35 +79,52 @@ def show_batch_results(df):
     with col2:
         segment_filter = st.selectbox(
             "Customer Segment",
-            ["All", "Segment 0", "Segment 1", "Segment 2", "Segment 3"],
+            ["All"] + [f"Segment {segment}" for segment in index.segments if segment is not None],
             key="segment_filter"
         )
     
     with col3:
         subscription_filter = st.selectbox(
             "Subscription Type",
-            ["All", "Basic", "Standard", "Premium"],
+            ["All"] + [subscription for subscription in index.subscriptions if subscription is not None],
             key="subscription_filter"
         )
     
-    # Apply filters
-    filtered_df = df.copy()
+    # Apply filters: the index returns the matching row positions, no boolean pass over the frame
+    filters = {
+        "risk": RISK_FILTERS.get(risk_filter),
+        "segment": None if segment_filter == "All" else int(segment_filter.split(" ")[1]),
+        "subscription": None if subscription_filter == "All" else subscription_filter,
+    }
+    filtered = index.metrics(**filters)
+    positions = index.select(**filters)
+    
+    st.markdown(f"**Showing {filtered['total']} of {total_customers} customers**")
+    
+    # Server-side sorting and pagination: only the visible page is formatted and sent to the browser
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        sort_options = [option for option, column in SORT_OPTIONS.items() if column is None or column in df.columns]
+        sort_by = st.selectbox("Sort by", sort_options, key="results_sort")
     
-    if risk_filter == "High Risk (>70%)":
-        filtered_df = filtered_df[filtered_df['churn_prob'] > 70]
-    elif risk_filter == "Medium Risk (30-70%)":
-        filtered_df = filtered_df[(filtered_df['churn_prob'] >= 30) & (filtered_df['churn_prob'] <= 70)]
-    elif risk_filter == "Low Risk (<30%)":
-        filtered_df = filtered_df[filtered_df['churn_prob'] < 30]
+    with col2:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=2, key="results_page_size")
     
-    if segment_filter != "All":
-        segment_num = int(segment_filter.split(" ")[1])
-        filtered_df = filtered_df[filtered_df['segment'] == segment_num]
+    page_count = max(1, -(-filtered['total'] // page_size))
+    if st.session_state.get("results_page", 1) > page_count:
+        st.session_state.results_page = page_count
     
-    if subscription_filter != "All":
-        filtered_df = filtered_df[filtered_df['subscription_type'] == subscription_filter]
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="results_page")
     
-    st.markdown(f"**Showing {len(filtered_df)} of {total_customers} customers**")
+    sort_column = SORT_OPTIONS[sort_by]
+    ordered = positions if sort_column is None else index.sort(positions, sort_column, df[sort_column])
+    start = (page - 1) * page_size
+    page_positions = ordered[start:start + page_size]
+    if len(page_positions):
+        st.caption(f"Page {page} of {page_count} • rows {start + 1:,}–{start + len(page_positions):,} "
+                   f"of {filtered['total']:,}")
     
     # Create comprehensive display dataframe
     display_columns = [
@@ -87,7 +135,9 @@ def show_batch_results(df):
     
     # Filter to only include columns that exist in the dataframe
     available_columns = [col for col in display_columns if col in df.columns]
-    display_df = filtered_df[available_columns].copy()
+    if 'risk_level' in df.columns:
+        available_columns.append('risk_level')
+    display_df = df.iloc[page_positions, df.columns.get_indexer(available_columns)]
     
     # Format numerical columns
     if 'churn_prob' in display_df.columns:
@@ -97,17 +147,9 @@ def show_batch_results(df):
     if 'avg_watch_time_per_day' in display_df.columns:
         display_df['avg_watch_time_per_day'] = display_df['avg_watch_time_per_day'].round(1)
     
-    # Add risk level column
-    def get_risk_level(prob):
-        if prob > 70:
-            return "🔴 High"
-        elif prob >= 30:
-            return "🟡 Medium"
-        else:
-            return "🟢 Low"
-    
-    if 'churn_prob' in display_df.columns:
-        display_df['risk_level'] = display_df['churn_prob'].apply(get_risk_level)
+    # Add risk level column (batches scored before risk levels were stored)
+    if 'risk_level' not in display_df.columns and 'churn_prob' in display_df.columns:
+        display_df['risk_level'] = risk_levels(display_df['churn_prob'])
     
     # Reorder columns to put predictions at the end
     prediction_columns = ['segment', 'risk_level', 'churn_prob', 'recommendation']
@@ -166,39 +208,46 @@ def show_batch_results(df):
     
     with col1:
         # Risk distribution
-        if 'Risk Level' in display_df.columns:
-            risk_counts = display_df['Risk Level'].value_counts()
-            st.metric("Highest Risk Group", f"{risk_counts.index[0] if len(risk_counts) > 0 else 'N/A'}")
+        if filtered['total'] > 0:
+            risk_counts = pd.Series(filtered['risk_counts']).sort_values(ascending=False, kind='stable')
+            st.metric("Highest Risk Group", risk_counts.index[0])
+        else:
+            st.metric("Highest Risk Group", "N/A")
     
     with col2:
         # Most common recommendation
-        if 'Recommendation' in display_df.columns:
-            top_recommendation = display_df['Recommendation'].mode()
-            if len(top_recommendation) > 0:
-                st.metric("Top Recommendation", top_recommendation[0][:30] + "..." if len(top_recommendation[0]) > 30 else top_recommendation[0])
+        recommendation_counts = {offer: count for offer, count in filtered['recommendation_counts'].items() if count}
+        if recommendation_counts:
+            top_recommendation = max(recommendation_counts, key=recommendation_counts.get)
+            st.metric("Top Recommendation", top_recommendation[:30] + "..." if len(top_recommendation) > 30 else top_recommendation)
     
     # Export options
     st.markdown("---")
     st.markdown("#### 📤 Export Results")
     
-    col1, col2 = st.columns(2)
+    export_format = st.selectbox("Export format", available_export_formats(), key="export_format")
+    extension, mime = EXPORT_FORMATS[export_format]
     
-    with col1:
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Filtered Results",
-            data=csv,
-            file_name="netflix_churn_analysis.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+    # Exports are only serialized on request, then cached per batch, filter state and format
+    filter_state = (risk_filter, segment_filter, subscription_filter)
+    requested = st.session_state.setdefault("export_requests", set())
+    exports = [
+        ("filtered", filter_state, positions, "Filtered Results", "netflix_churn_analysis"),
+        ("full", None, None, "Full Analysis", "netflix_complete_analysis"),
+    ]
     
-    with col2:
-        full_csv = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Full Analysis",
-            data=full_csv,
-            file_name="netflix_complete_analysis.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
\ No newline at end of file
+    for column, (scope, state, export_positions, title, file_stem) in zip(st.columns(2), exports):
+        with column:
+            request = (cache_key, scope, state, export_format)
+            if request in requested:
+                st.download_button(
+                    label=f"📥 Download {title}",
+                    data=_cached_export(cache_key, state, export_format, df, export_positions),
+                    file_name=file_stem + extension,
+                    mime=mime,
+                    use_container_width=True,
+                    key=f"download_{scope}"
+                )
+            elif st.button(f"📦 Prepare {title}", use_container_width=True, key=f"prepare_{scope}"):
+                requested.add(request)
+                st.rerun()
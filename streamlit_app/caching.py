@@ -0,0 +1,136 @@
+# caching.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from metrics import metrics
+
+
+def batch_cache_key(data, model_version: str) -> str:
+    """
+    Content address of a processed batch: the uploaded bytes (any bytes-like
+    object, e.g. a memoryview of the upload) plus the model artifact version.
+    """
+    digest = hashlib.sha256(data)
+    digest.update(model_version.encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of processed batch DataFrames with a memory budget in bytes.
+    Entries evicted from memory (or too large for it) fall back to an
+    optional on-disk tier, from which they are promoted again on a hit.
+    Thread-safe, so one instance can be shared by all Streamlit sessions.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, disk_dir: str = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (DataFrame, size in bytes)
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key: str):
+        """Return the cached DataFrame for key, or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.count("cache_requests", cache="batch", result="hit")
+                return self._entries[key][0]
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            df = pd.read_pickle(self._disk_path(key))
+            with self._lock:
+                self.disk_hits += 1
+            metrics.count("cache_requests", cache="batch", result="disk_hit")
+            self._put_memory(key, df)
+            return df
+
+        with self._lock:
+            self.misses += 1
+        metrics.count("cache_requests", cache="batch", result="miss")
+        return None
+
+    def put(self, key: str, df: pd.DataFrame):
+        if self.disk_dir and not os.path.exists(self._disk_path(key)):
+            df.to_pickle(self._disk_path(key))
+        self._put_memory(key, df)
+
+    def _put_memory(self, key: str, df: pd.DataFrame):
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return  # only the disk tier (if any) can hold it
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.current_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+class AnalysisMemo:
+    """
+    Bounded LRU memo for single-customer analyses, keyed on a hashable input
+    tuple. When version_fn is given, every lookup compares its result with
+    the version the entries were computed under and clears the memo when the
+    model artifacts change. version_fn must report the version of the models
+    compute() will use (ModelRegistry.refresh), not merely the files on disk.
+    """
+
+    def __init__(self, max_entries: int = 1024, version_fn=None):
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+        self.version = version_fn() if version_fn else None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the memoized result for key, calling compute() on a miss."""
+        with self._lock:
+            if self.version_fn is not None:
+                version = self.version_fn()
+                if version != self.version:
+                    self._entries.clear()
+                    self.version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                metrics.count("cache_requests", cache="analysis", result="hit")
+                return self._entries[key]
+            self.misses += 1
+            metrics.count("cache_requests", cache="analysis", result="miss")
+
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,173 @@
+# charts.py
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from batch_index import RISK_LEVELS, risk_codes
+
+SEGMENT_COLORS = ['#E50914', '#1DB954', '#FFD700', '#007BFF']
+RISK_COLORS = ['#1DB954', '#FFD700', '#E50914']
+FEATURE_NAMES = ["Age", "Gender", "Subscription", "Watch Hours", "Last Login",
+                 "Region", "Device", "Payment", "Profiles", "Avg Watch", "Genre"]
+BEFORE_AFTER_SAMPLE = 50
+
+
+# --- Aggregates (one pass over the batch) ---
+def batch_aggregates(df, seed: int = 0) -> dict:
+    """
+    Everything the dashboard charts draw, reduced to a few small arrays:
+    per-segment counts and revenue at risk, the churn histogram, risk band
+    counts and a fixed sample of before/after churn probabilities.
+    """
+    churn_prob = df['churn_prob'].to_numpy(dtype=np.float64)
+    segments, segment_codes = np.unique(df['segment'].to_numpy(), return_inverse=True)
+    hist_counts, hist_edges = np.histogram(churn_prob, bins=8)
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(df), min(BEFORE_AFTER_SAMPLE, len(df)), replace=False)
+
+    return {
+        "segments": segments,
+        "segment_counts": np.bincount(segment_codes, minlength=len(segments)),
+        "segment_revenue_loss": np.bincount(segment_codes, weights=df['revenue_loss'].to_numpy(dtype=np.float64),
+                                            minlength=len(segments)),
+        "churn_hist": (hist_counts, hist_edges),
+        "risk_counts": np.bincount(risk_codes(churn_prob), minlength=len(RISK_LEVELS)),
+        "before_probs": churn_prob[sample],
+        "after_probs": df['churn_prob_after'].to_numpy(dtype=np.float64)[sample],
+    }
+
+
+def figure_png(fig) -> bytes:
+    """Render a figure to PNG bytes and release it."""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format="png", bbox_inches="tight", dpi=200)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+# --- Charts (each returns a matplotlib Figure) ---
+def segment_chart(agg: dict):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    bars = ax.bar(agg["segments"].astype(str), agg["segment_counts"], color=SEGMENT_COLORS, alpha=0.9)
+    ax.set_xlabel('Segment ID', fontweight=600)
+    ax.set_ylabel('Number of Customers', fontweight=600)
+    ax.set_title('Customer Segments Distribution', fontweight=700, pad=15)
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
+                f'{int(height)}', ha='center', va='bottom', fontweight=600, color='white')
+    return fig
+
+
+def churn_histogram(agg: dict):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    counts, edges = agg["churn_hist"]
+    ax.hist(edges[:-1], bins=edges, weights=counts, color='#E50914', alpha=0.8, edgecolor='white', linewidth=1)
+    ax.set_xlabel('Churn Probability (%)', fontweight=600)
+    ax.set_ylabel('Number of Customers', fontweight=600)
+    ax.set_title('Churn Distribution', fontweight=700, pad=12)
+    return fig
+
+
+def feature_importance_chart(model):
+    fig, ax = plt.subplots(figsize=(6, 4))
+
+    if hasattr(model, 'feature_importances_'):
+        importances = model.feature_importances_
+    elif 'classifier' in model and hasattr(model['classifier'], 'feature_importances_'):
+        importances = model['classifier'].feature_importances_
+    else:
+        importances = np.ones(len(FEATURE_NAMES)) / len(FEATURE_NAMES)
+
+    importances = importances[:len(FEATURE_NAMES)]
+    indices = np.argsort(importances)
+
+    bars = ax.barh(np.array(FEATURE_NAMES)[indices], importances[indices], color='#E50914', alpha=0.8)
+
+    # Add value labels
+    for bar, importance in zip(bars, importances[indices]):
+        ax.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2.,
+                f'{importance:.3f}', ha='left', va='center', fontweight=600, color='white', fontsize=8)
+
+    ax.set_xlabel('Importance Score', fontweight=600)
+    ax.set_title('Feature Importance for Churn Prediction', fontweight=700, pad=12)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+def before_after_chart(agg: dict):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    before_probs, after_probs = agg["before_probs"], agg["after_probs"]
+
+    x = np.arange(len(before_probs))
+    width = 0.35
+
+    ax.bar(x - width/2, before_probs, width, label='Before', color='#E50914', alpha=0.8)
+    ax.bar(x + width/2, after_probs, width, label='After', color='#1DB954', alpha=0.8)
+
+    ax.set_xlabel('Customer Sample', fontweight=600)
+    ax.set_ylabel('Churn Probability (%)', fontweight=600)
+    ax.set_title('Churn Probability: Before vs After Recommendations', fontweight=700, pad=12)
+    ax.legend(facecolor='#141414')
+    ax.set_xticks([])  # Remove x-axis ticks for cleaner look
+
+    # Add average improvement text
+    avg_improvement = ((before_probs - after_probs) / before_probs * 100).mean()
+    ax.text(0.02, 0.98, f'Avg Improvement: {avg_improvement:.1f}%',
+            transform=ax.transAxes, fontweight=600, color='#1DB954',
+            bbox=dict(boxstyle="round,pad=0.3", facecolor='#141414', alpha=0.8))
+    return fig
+
+
+def revenue_chart(agg: dict):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    bars = ax.bar(agg["segments"].astype(str), agg["segment_revenue_loss"], color=SEGMENT_COLORS, alpha=0.9)
+    ax.set_xlabel('Segment ID', fontweight=600)
+    ax.set_ylabel('Revenue at Risk (₹)', fontweight=600)
+    ax.set_title('Revenue Impact by Segment', fontweight=700, pad=12)
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 1000,
+                f'₹{height:,.0f}', ha='center', va='bottom', fontweight=600, color='white', fontsize=9)
+    return fig
+
+
+def risk_chart(agg: dict):
+    low_risk, medium_risk, high_risk = agg["risk_counts"]
+
+    fig, ax = plt.subplots(figsize=(6, 4))
+    labels = [f'Low Risk\n({low_risk})', f'Medium Risk\n({medium_risk})', f'High Risk\n({high_risk})']
+
+    wedges, texts, autotexts = ax.pie(agg["risk_counts"], labels=labels, colors=RISK_COLORS, autopct='%1.1f%%',
+                                      startangle=90, textprops={'color': 'white', 'fontweight': '600'})
+
+    # Enhance the autopct text
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('600')
+
+    ax.set_title('Customer Risk Distribution', fontweight=700, pad=20, color='white')
+    return fig
+
+
+# Batch chart name -> renderer, in dashboard order
+BATCH_CHARTS = {
+    "segments": segment_chart,
+    "churn": churn_histogram,
+    "before_after": before_after_chart,
+    "revenue": revenue_chart,
+    "risk": risk_chart,
+}
+
+
+def render_batch_charts(df, seed: int = 0) -> dict:
+    """PNG bytes for every batch chart, from a single aggregation pass."""
+    agg = batch_aggregates(df, seed)
+    return {name: figure_png(render(agg)) for name, render in BATCH_CHARTS.items()}
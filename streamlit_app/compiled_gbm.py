@@ -0,0 +1,94 @@
+# compiled_gbm.py
+import numpy as np
+
+
+class CompiledGradientBoosting:
+    """
+    Array-backed inference for a fitted binary GradientBoostingClassifier.
+    Every tree is padded to a complete binary tree of the ensemble's depth and
+    flattened into contiguous arrays (feature, threshold, leaf value) in heap
+    order, so the children of node i are 2i+1 and 2i+2. Rows are evaluated
+    level by level for all trees at once, without sklearn's per-call overhead.
+    """
+
+    # Rows evaluated per block; keeps the (rows x trees) position matrix in cache
+    block_size = 512
+
+    def __init__(self, model):
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("Only binary GradientBoostingClassifier models are supported.")
+
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        # At least one level, so every tree has a root split (a padded one for stumps)
+        self.depth = max(1, max(tree.max_depth for tree in trees))
+        n_internal = 2 ** self.depth - 1
+        n_trees = len(trees)
+
+        # Padding nodes always go left (threshold +inf) and carry their leaf value down
+        self.feature = np.zeros((n_trees, n_internal), dtype=np.int32)
+        self.threshold = np.full((n_trees, n_internal), np.inf, dtype=np.float64)
+        self.leaf_value = np.zeros((n_trees, n_internal + 1), dtype=np.float64)
+
+        for t, tree in enumerate(trees):
+            stack = [(0, 0, 0)]  # (sklearn node id, heap position, depth)
+            while stack:
+                node, pos, depth = stack.pop()
+                if tree.children_left[node] == -1:
+                    # Fill every heap leaf below this position with the node's value
+                    span = 2 ** (self.depth - depth)
+                    first_leaf = (pos + 1) * span - 1 - n_internal
+                    self.leaf_value[t, first_leaf:first_leaf + span] = tree.value[node, 0, 0] * model.learning_rate
+                else:
+                    self.feature[t, pos] = tree.feature[node]
+                    self.threshold[t, pos] = tree.threshold[node]
+                    stack.append((tree.children_left[node], 2 * pos + 1, depth + 1))
+                    stack.append((tree.children_right[node], 2 * pos + 2, depth + 1))
+
+        # Roots are compared column-wise; deeper levels gather through the flat arrays
+        self.root_feature = self.feature[:, 0].astype(np.intp)
+        self.root_threshold = self.threshold[:, 0].copy()
+        # np.take casts other index types to intp on every call, so store intp
+        self.feature = self.feature.ravel().astype(np.intp)
+        self.threshold = self.threshold.ravel()
+        self.leaf_value = self.leaf_value.ravel()
+        self.internal_offsets = np.arange(n_trees, dtype=np.intp) * n_internal
+        self.leaf_offsets = np.arange(n_trees, dtype=np.intp) * (n_internal + 1) - n_internal
+        self.n_features = model.n_features_in_
+        self.classes_ = model.classes_
+
+        # Constant raw score of the init estimator (log-odds of the class prior)
+        self.init_raw = float(model._raw_predict_init(np.zeros((1, self.n_features), dtype=np.float32))[0, 0])
+
+    def decision_function(self, X) -> np.ndarray:
+        """Raw log-odds score for every row of X."""
+        # sklearn thresholds on float32 inputs, so cast the same way for parity
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}.")
+        # sklearn refuses these; comparisons with NaN would silently send every row left
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN." if np.isnan(X).any()
+                             else "Input X contains infinity or a value too large for dtype('float32').")
+
+        raw = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], self.block_size):
+            block = np.ascontiguousarray(X[start:start + self.block_size]).ravel()
+            n_rows = block.shape[0] // self.n_features
+            # Flat offset of each row's first feature, broadcast over trees
+            row_offsets = (np.arange(n_rows, dtype=np.intp) * self.n_features)[:, None]
+            # Heap position within each tree after the root split
+            pos = 1 + (block.reshape(n_rows, self.n_features).take(self.root_feature, axis=1) > self.root_threshold)
+            for _ in range(1, self.depth):
+                node = pos + self.internal_offsets
+                x = np.take(block, row_offsets + np.take(self.feature, node))
+                pos = 2 * pos + 1 + (x > np.take(self.threshold, node))
+            raw[start:start + n_rows] = self.init_raw + np.take(self.leaf_value, pos + self.leaf_offsets).sum(axis=1)
+        return raw
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities with the same layout as GradientBoostingClassifier.predict_proba."""
+        proba_pos = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - proba_pos, proba_pos])
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
@@ -0,0 +1,187 @@
+# metrics.py
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _NullTimer:
+    """Shared no-op stage timer used while instrumentation is disabled."""
+    rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "rows", "start")
+
+    def __init__(self, metrics, name: str, rows: int):
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class Metrics:
+    """
+    Process-wide timing and counter instrumentation for the scoring stages.
+    Every stage gets a latency histogram and a rows-processed counter;
+    count() keeps labelled counters such as cache hits. Stages observed
+    since the last begin_run() form the "last run" breakdown. When
+    disabled, stage() returns a shared no-op timer and nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = True, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}    # name -> {"buckets": [...], "sum": s, "count": n, "rows": r}
+            self._counters = {}  # (name, ((label, value), ...)) -> value
+            self._run = {"label": None, "started": None, "stages": {}}
+
+    # --- Recording ---
+    def stage(self, name: str, rows: int = 0):
+        """Context manager timing one execution of a stage (set .rows inside if unknown up front)."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name, rows)
+
+    def timed(self, name: str, iterable):
+        """Iterate, timing each step as a stage and counting len(item) rows."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - start, len(item))
+            yield item
+
+    def observe(self, name: str, seconds: float, rows: int = 0):
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0,
+                                              "count": 0, "rows": 0}
+            stage["buckets"][bisect_left(self.buckets, seconds)] += 1
+            stage["sum"] += seconds
+            stage["count"] += 1
+            stage["rows"] += rows
+
+            run = self._run["stages"].setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})
+            run["seconds"] += seconds
+            run["rows"] += rows
+            run["calls"] += 1
+
+    def count(self, name: str, value: int = 1, **labels):
+        """Increment the counter name{labels} by value."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def begin_run(self, label: str):
+        """Start a new "last run" breakdown (e.g. one batch upload)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._run = {"label": label, "started": time.time(), "stages": {}}
+
+    # --- Reading ---
+    def last_run(self) -> dict:
+        with self._lock:
+            return {**self._run, "stages": {name: dict(stage) for name, stage in self._run["stages"].items()}}
+
+    def snapshot(self) -> dict:
+        """All metrics as plain JSON-serializable data (histogram buckets are cumulative)."""
+        with self._lock:
+            stages = {}
+            for name, stage in self._stages.items():
+                cumulative, total = {}, 0
+                for bound, count in zip([*map(str, self.buckets), "+Inf"], stage["buckets"]):
+                    total += count
+                    cumulative[bound] = total
+                stages[name] = {"count": stage["count"], "sum_seconds": stage["sum"], "rows": stage["rows"],
+                                "buckets": cumulative}
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self._counters.items()]
+        return {"enabled": self.enabled, "stages": stages, "counters": counters, "last_run": self.last_run()}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "scoring") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        snapshot = self.snapshot()
+
+        def labels(**values):
+            escaped = ",".join(f'{key}="{_escape(value)}"' for key, value in values.items())
+            return "{" + escaped + "}" if escaped else ""
+
+        lines = [f"# HELP {prefix}_stage_seconds Time spent per scoring stage.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, stage in snapshot["stages"].items():
+            for bound, count in stage["buckets"].items():
+                lines.append(f"{prefix}_stage_seconds_bucket{labels(stage=name, le=bound)} {count}")
+            lines.append(f"{prefix}_stage_seconds_sum{labels(stage=name)} {stage['sum_seconds']:.6f}")
+            lines.append(f"{prefix}_stage_seconds_count{labels(stage=name)} {stage['count']}")
+
+        lines += [f"# HELP {prefix}_stage_rows_total Rows processed per scoring stage.",
+                  f"# TYPE {prefix}_stage_rows_total counter"]
+        for name, stage in snapshot["stages"].items():
+            lines.append(f"{prefix}_stage_rows_total{labels(stage=name)} {stage['rows']}")
+
+        for name in dict.fromkeys(counter["name"] for counter in snapshot["counters"]):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for counter in snapshot["counters"]:
+                if counter["name"] == name:
+                    lines.append(f"{prefix}_{name}_total{labels(**counter['labels'])} {counter['value']}")
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        """Text table of the last run's stages."""
+        run = self.last_run()
+        total = sum(stage["seconds"] for stage in run["stages"].values())
+        lines = []
+        for name, stage in run["stages"].items():
+            share = stage["seconds"] / total * 100 if total else 0.0
+            lines.append(f"  {name:<20} {stage['seconds']:8.3f}s  {share:5.1f}%  {stage['rows']:>12,} rows")
+        return "\n".join(lines)
+
+
+# Process-wide instance; SCORING_METRICS=0 turns instrumentation off
+metrics = Metrics(enabled=os.environ.get("SCORING_METRICS", "1").lower() not in ("0", "false", "off"))
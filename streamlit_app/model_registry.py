@@ -0,0 +1,130 @@
+# model_registry.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+
+# --- Paths ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "..", "models")
+
+
+class ModelRegistry:
+    """
+    Lazily loads model artifacts from MODEL_DIR, once per version of the
+    files. Artifacts are addressed by file name (.joblib or .json); objects
+    derived from them (compiled encoders, projectors) are registered through
+    component() so they are built once as well. Load times are recorded.
+    refresh() reloads everything when the files change (e.g. after a retrain).
+    add_file() serves an artifact from outside MODEL_DIR; it is versioned too.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR):
+        self.model_dir = model_dir
+        self.load_times = {}
+        self._objects = {}
+        self.external_files = {}  # artifact name -> path outside model_dir
+        # version() of the files the loaded objects came from (None until the first load)
+        self.loaded_version = None
+        self._lock = threading.RLock()
+        # Time spent in nested loads, so each entry records only its own cost
+        self._nested = []
+
+    def _load_once(self, name: str, loader):
+        # Fast path without the lock once the object exists
+        if name in self._objects:
+            return self._objects[name]
+        with self._lock:
+            if name not in self._objects:
+                start = time.perf_counter()
+                self._nested.append(0.0)
+                try:
+                    self._objects[name] = loader()
+                finally:
+                    elapsed = time.perf_counter() - start
+                    inner = self._nested.pop()
+                    if self._nested:
+                        self._nested[-1] += elapsed
+                self.load_times[name] = elapsed - inner
+        return self._objects[name]
+
+    def get(self, filename: str):
+        """Return the artifact stored as models/<filename>, loading it on first use."""
+        def load():
+            if self.loaded_version is None:
+                self.loaded_version = self.version()
+            path = self.path(filename)
+            if filename.endswith(".json"):
+                with open(path, "r") as f:
+                    return json.load(f)
+            return joblib.load(path)
+        return self._load_once(filename, load)
+
+    def path(self, filename: str) -> str:
+        return self.external_files.get(filename) or os.path.join(self.model_dir, filename)
+
+    def add_file(self, filename: str, path: str):
+        """Serve the artifact filename from path instead of model_dir (e.g. a config override)."""
+        self.external_files[filename] = os.path.abspath(path)
+
+    def component(self, name: str, factory):
+        """Return the object built by factory() under name, building it on first use."""
+        return self._load_once(name, factory)
+
+    def preload(self, filenames):
+        for filename in filenames:
+            self.get(filename)
+
+    def version(self) -> str:
+        """
+        Short fingerprint of the artifacts on disk (name, path, size,
+        modification time), so caches of model outputs can be invalidated when
+        they change. Files added with add_file() replace their namesakes.
+        """
+        digest = hashlib.sha256()
+        filenames = {name for name in os.listdir(self.model_dir) if name.endswith((".joblib", ".json"))}
+        for filename in sorted(filenames | set(self.external_files)):
+            path = self.path(filename)
+            stat = os.stat(path)
+            name = f"{filename}@{path}" if filename in self.external_files else filename
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:16]
+
+    def refresh(self) -> str:
+        """
+        Make the loaded objects match the files on disk and return their
+        version. If the files changed since loading, every artifact and
+        component is dropped and the artifacts that were in use are loaded
+        again. Key caches of model outputs on this, not on version(), so a
+        key always names the models that produced the result.
+        """
+        with self._lock:
+            # Retry while files keep changing under the reload (a retrain still writing)
+            for _ in range(5):
+                version = self.version()
+                if version == self.loaded_version:
+                    break
+                if self.loaded_version is None:
+                    self.loaded_version = version
+                    break
+                artifacts = [name for name in self._objects if name.endswith((".joblib", ".json"))]
+                self._objects.clear()
+                self.load_times.clear()
+                self.loaded_version = version
+                self.preload(artifacts)
+            return self.loaded_version
+
+    def loaded(self) -> list:
+        return list(self._objects)
+
+    def report(self) -> str:
+        lines = [f"{name:<36} {seconds * 1000:8.1f} ms" for name, seconds in self.load_times.items()]
+        lines.append(f"{'total':<36} {sum(self.load_times.values()) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+# Process-wide registry shared by prediction, segmentation and the app
+registry = ModelRegistry()
@@ -0,0 +1,133 @@
+# parallel.py
+import os
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from prediction import INPUT_COLUMNS, CHURN_ARTIFACTS
+from segmentation import SEGMENTATION_ARTIFACTS
+from pipeline import ScoringPipeline
+from model_registry import registry
+from metrics import metrics
+
+# Workers are not forked from the (possibly multithreaded, e.g. Streamlit) parent,
+# whose locks another thread may hold at fork time
+DEFAULT_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# --- Worker state: one pipeline per process, created by the pool initializer ---
+_worker_pipeline = None
+
+
+def _init_worker(churn_engine: str = "sklearn"):
+    global _worker_pipeline
+    _worker_pipeline = ScoringPipeline(churn_engine=churn_engine)
+    # Load the models before taking any chunk
+    registry.preload(CHURN_ARTIFACTS + list(SEGMENTATION_ARTIFACTS.values()))
+    registry.refresh()
+
+
+def _worker_ready(_) -> int:
+    # Held briefly, so one worker cannot answer every start() probe
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    # Long-lived workers pick up retrained artifacts like the parent process does
+    registry.refresh()
+    return _worker_pipeline.score(chunk)
+
+
+class ParallelScorer:
+    """
+    Shard a DataFrame into row chunks and score them in a process pool.
+    Each worker loads the models once (again only after a retrain); results are reassembled in input
+    order and are identical to ScoringPipeline.score on the whole frame.
+    The pool is started on first use (or by start()) and kept until close().
+    Workers use DEFAULT_START_METHOD unless an mp_context is given.
+    """
+
+    def __init__(self, workers: int = None, chunk_size: int = 50_000, mp_context=None,
+                 churn_engine: str = "sklearn"):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.mp_context = mp_context or multiprocessing.get_context(DEFAULT_START_METHOD)
+        self.churn_engine = churn_engine
+        self._pool = None
+        self._serial = ScoringPipeline(churn_engine=churn_engine)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context,
+                                             initializer=_init_worker, initargs=(self.churn_engine,))
+        return self._pool
+
+    def start(self) -> "ParallelScorer":
+        """Start every worker and wait until each one has loaded the models."""
+        pool = self._get_pool()
+        ready = set()
+        while len(ready) < self.workers:
+            ready.update(pool.map(_worker_ready, range(self.workers)))
+        return self
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Same output as ScoringPipeline.score, computed across worker processes."""
+        if self.workers == 1 or len(df) <= self.chunk_size:
+            return self._serial.score(df)
+
+        # Only ship the columns the models read
+        features = df[INPUT_COLUMNS]
+        chunks = [features.iloc[start:start + self.chunk_size] for start in range(0, len(df), self.chunk_size)]
+
+        # Executor.map yields results in submission order. Per-stage timings
+        # stay in the worker processes; here the whole pool call is one stage.
+        with metrics.stage("score (parallel)", len(df)):
+            return pd.concat(self._get_pool().map(_score_chunk, chunks))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Scaling benchmark ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel batch scoring against the serial pipeline.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to score (sampled from the raw dataset).")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to try (default: powers of two up to the core count).")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw", "netflix_customer_churn.csv")
+    sample = pd.read_csv(data_path)
+    df = sample.sample(args.rows, replace=True, random_state=42).reset_index(drop=True)
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores} | {cores})
+
+    start = time.perf_counter()
+    expected = ScoringPipeline().score(df)
+    serial_time = time.perf_counter() - start
+    print(f"serial       {serial_time:8.2f}s  {args.rows / serial_time:12,.0f} rows/s")
+
+    for workers in worker_counts:
+        with ParallelScorer(workers=workers, chunk_size=args.chunk_size) as scorer:
+            # Exclude worker start-up and model loading from the timing
+            scorer.start()
+            start = time.perf_counter()
+            result = scorer.score(df)
+            elapsed = time.perf_counter() - start
+
+        identical = result.index.equals(expected.index) and result.equals(expected)
+        print(f"workers={workers:<4} {elapsed:8.2f}s  {args.rows / elapsed:12,.0f} rows/s  "
+              f"speedup x{serial_time / elapsed:5.2f}  identical={identical}")
@@ -0,0 +1,135 @@
+# pipeline.py
+import os
+import pandas as pd
+
+from prediction import INPUT_COLUMNS, preprocess_churn, churn_from_features, predict_churn_profile
+from segmentation import assign_clusters, assign_profile
+from recommendation import get_recommendation_engine, recommend_offer
+from schema import CSV_DTYPES, apply_input_schema
+from metrics import metrics
+
+
+class ScoringPipeline:
+    """
+    Score a raw customer upload in a single pass.
+    Both the segmentation and churn branches read the raw input columns in
+    place, without copying the frame; the recommendation is derived from both
+    results.
+    churn_engine runs the churn model for score(), profile_engine for
+    analyze(), whose single rows are fastest on the compiled model.
+    """
+
+    output_columns = ["segment", "churn_prob", "recommendation"]
+
+    def __init__(self, churn_engine: str = "sklearn", profile_engine: str = "compiled"):
+        self.churn_engine = churn_engine
+        self.profile_engine = profile_engine
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Check that df has every column both models use and return it as is.
+        The encoders only read columns, so neither branch needs a copy.
+        """
+        missing = [col for col in INPUT_COLUMNS if col not in df.columns]
+        if missing:
+            raise KeyError(f"missing columns: {', '.join(missing)}")
+        return df
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns a DataFrame aligned to df.index with 'segment',
+        'churn_prob' (percent) and 'recommendation' columns.
+        Time per stage is recorded in metrics.
+        """
+        features = self.prepare(df)
+
+        # KMeans branch
+        segment = assign_clusters(features)
+
+        # GBM branch
+        churn_prob = churn_from_features(preprocess_churn(features), df.index,
+                                         engine=self.churn_engine)["churn_probability"].to_numpy()
+
+        recommendation = get_recommendation_engine().recommend_batch(
+            segment, churn_prob, features["subscription_type"])
+
+        return pd.DataFrame({
+            "segment": segment,
+            "churn_prob": churn_prob,
+            "recommendation": recommendation
+        }, index=df.index)
+
+    def analyze(self, profile: dict) -> dict:
+        """
+        Full single-customer analysis from a dict of the raw INPUT_COLUMNS.
+        Returns 'segment', 'predicted_class', 'churn_probability' (percent)
+        and 'recommendation'. The dict goes straight into feature rows,
+        without a one-row DataFrame.
+        """
+        segment = assign_profile(profile)
+        churn = predict_churn_profile(profile, engine=self.profile_engine)
+        churn_probability = churn["churn_probability"]
+
+        return {
+            "segment": segment,
+            "predicted_class": churn["predicted_class"],
+            "churn_probability": churn_probability,
+            "recommendation": recommend_offer(segment, churn_probability, profile["subscription_type"])
+        }
+
+    def score_stream(self, source, output_path: str, chunksize: int = 100_000, on_progress=None) -> dict:
+        """
+        Score a CSV in fixed-size chunks, appending each scored chunk to
+        output_path, so peak memory is bounded by chunksize rather than by the
+        file size. source is a path or a binary file object.
+        on_progress(fraction, rows_done) is called after every chunk with the
+        fraction of input bytes consumed.
+        Returns summary totals over all rows plus a small preview frame.
+        """
+        handle = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+        try:
+            start = handle.tell()
+            total_bytes = handle.seek(0, os.SEEK_END) - start
+            handle.seek(start)
+
+            summary = {"rows": 0, "high_risk": 0, "medium_risk": 0, "churn_prob_sum": 0.0, "preview": None}
+            chunks = pd.read_csv(handle, chunksize=chunksize, dtype=CSV_DTYPES)
+            for i, chunk in enumerate(metrics.timed("parse", chunks)):
+                apply_input_schema(chunk)
+                scores = self.score(chunk)
+                for col in self.output_columns:
+                    chunk[col] = scores[col]
+                with metrics.stage("write", len(chunk)):
+                    chunk.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+
+                churn_prob = scores["churn_prob"]
+                summary["rows"] += len(chunk)
+                summary["high_risk"] += int((churn_prob > 70).sum())
+                summary["medium_risk"] += int(((churn_prob >= 30) & (churn_prob <= 70)).sum())
+                summary["churn_prob_sum"] += float(churn_prob.sum())
+                if summary["preview"] is None:
+                    summary["preview"] = chunk.head()
+
+                if on_progress is not None:
+                    consumed = handle.tell() - start
+                    on_progress(min(consumed / total_bytes, 1.0) if total_bytes else 1.0, summary["rows"])
+        finally:
+            if handle is not source:
+                handle.close()
+
+        summary["avg_churn_prob"] = summary["churn_prob_sum"] / summary["rows"] if summary["rows"] else 0.0
+        return summary
+
+
+def normalize_profile(profile: dict) -> dict:
+    """The INPUT_COLUMNS of a customer profile with numbers as float and strings trimmed."""
+    return {col: profile[col].strip() if isinstance(profile[col], str) else float(profile[col])
+            for col in INPUT_COLUMNS}
+
+
+def profile_key(profile: dict) -> tuple:
+    """
+    Hashable form of a normalized profile (see normalize_profile). Score the
+    normalized profile too, so equal keys always mean equal inputs.
+    """
+    return tuple(profile[col] for col in INPUT_COLUMNS)
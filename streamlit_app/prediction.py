@@ -1,50 +1,263 @@
 # prediction.py
 import pandas as pd
-import joblib
-import json
+import numpy as np
 
-# Load GBM model and features
-gb_model = joblib.load("../models/gb_churn_model.joblib")
-with open("../models/gb_features.json", "r") as f:
-    gb_features = json.load(f)
+from compiled_gbm import CompiledGradientBoosting
+from model_registry import registry
+from metrics import metrics
+
+# --- Model artifacts (loaded lazily through the shared registry) ---
+CHURN_ARTIFACTS = ["gb_churn_model.joblib", "gb_features.json", "churn_transform.json"]
+
+def get_gb_model():
+    return registry.get("gb_churn_model.joblib")
+
+def get_gb_features() -> list:
+    return registry.get("gb_features.json")
+
+def get_churn_transform() -> dict:
+    return registry.get("churn_transform.json")
+
+def __getattr__(name):
+    # Keep `prediction.gb_model` / `prediction.gb_features` working without import-time loads
+    if name == "gb_model":
+        return get_gb_model()
+    if name == "gb_features":
+        return get_gb_features()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+subscription_price_map = {"Basic": 8.99, "Standard": 13.99, "Premium": 17.99}
+churn_categorical_cols = ['payment_method', 'region', 'device', 'favorite_genre']
+churn_numeric_cols = ['watch_hours', 'last_login_days', 'number_of_profiles', 'avg_watch_time_per_day']
+# Columns with IQR-capped and log1p variants
+churn_capped_cols = ['watch_hours', 'avg_watch_time_per_day']
+
+
+# --- Fitted feature transform (models/churn_transform.json) ---
+CHURN_TRANSFORM_VERSION = 1
+
+def fit_churn_transform(df: pd.DataFrame) -> dict:
+    """
+    Learn the transform state from training rows: IQR capping bounds,
+    the subscription price map and each categorical column's categories
+    (the first, in sorted order, is the dropped reference level).
+    """
+    iqr_bounds = {}
+    for col in churn_capped_cols:
+        q1, q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+        iqr_bounds[col] = [float(q1 - 1.5 * (q3 - q1)), float(q3 + 1.5 * (q3 - q1))]
+    return {
+        "version": CHURN_TRANSFORM_VERSION,
+        "iqr_bounds": iqr_bounds,
+        "subscription_price": dict(subscription_price_map),
+        "categories": {col: sorted(df[col].astype(str).unique()) for col in churn_categorical_cols},
+    }
+
+def churn_feature_names(transform: dict) -> list:
+    """Model input columns for a transform, in training (pd.get_dummies, drop_first) order."""
+    names = list(churn_numeric_cols)
+    for col in churn_capped_cols:
+        names += [f"{col}_capped", f"{col}_log"]
+    names += ["avg_watch_time_per_profile", "subscription_price"]
+    for col in churn_categorical_cols:
+        names += [f"{col}_{category}" for category in transform["categories"][col][1:]]
+    return names
+
+
+class ChurnFeatureEncoder:
+    """
+    Fixed-schema encoder compiled once from the model's feature list.
+    Every (column, category) pair maps straight to a column index of a
+    preallocated float32 matrix, so encoding costs the same for one row or
+    a million and never depends on which categories the input contains.
+    Capped, log and price features are computed from the fitted transform.
+    """
+
+    def __init__(self, feature_names, categorical_cols, transform: dict = None):
+        self.feature_names = list(feature_names)
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        transform = transform or {}
+        self.price_map = transform.get("subscription_price", subscription_price_map)
+
+        # (source column, feature index, (lower, upper) bounds, or None for log1p)
+        self.derived = []
+        for col in churn_capped_cols:
+            bounds = transform.get("iqr_bounds", {}).get(col)
+            for name, op in ((f"{col}_capped", bounds), (f"{col}_log", None)):
+                if name not in self.index:
+                    continue
+                if name.endswith("_capped") and bounds is None:
+                    raise ValueError(f"Feature '{name}' needs IQR bounds for '{col}' from the churn transform.")
+                self.derived.append((col, self.index[name], op))
+
+        # (column, category) -> feature index, grouped per categorical column
+        self.dummy_columns = {}
+        for col in categorical_cols:
+            prefix = col + "_"
+            pairs = [(name[len(prefix):], i) for name, i in self.index.items() if name.startswith(prefix)]
+            self.dummy_columns[col] = (pd.Index([category for category, _ in pairs]),
+                                       np.array([i for _, i in pairs], dtype=np.intp))
+
+        # The same lookups as plain dicts, for encode_one
+        self.dummy_lookup = {col: dict(zip(categories, feature_idx.tolist()))
+                             for col, (categories, feature_idx) in self.dummy_columns.items()}
+
+        dummy_names = {self.feature_names[i] for _, idx in self.dummy_columns.values() for i in idx}
+        derived_names = {self.feature_names[i] for _, i, _ in self.derived}
+        self.numeric_columns = [(name, i) for name, i in self.index.items()
+                                if name not in dummy_names and name not in derived_names]
+
+    def encode(self, df: pd.DataFrame) -> np.ndarray:
+        """Encode raw customer rows into an (n_rows, n_features) float32 matrix."""
+        n_rows = len(df)
+        X = np.zeros((n_rows, len(self.feature_names)), dtype=np.float32)
+
+        for name, i in self.numeric_columns:
+            if name in df.columns:
+                X[:, i] = df[name].to_numpy(dtype=np.float64)
+            # Features without an input column stay zero-filled
+
+        # Feature engineering, written straight into the matrix
+        for col, i, bounds in self.derived:
+            values = df[col].to_numpy(dtype=np.float64)
+            X[:, i] = np.clip(values, *bounds) if bounds is not None else np.log1p(values)
+        if "avg_watch_time_per_profile" in self.index:
+            X[:, self.index["avg_watch_time_per_profile"]] = (df['avg_watch_time_per_day'].to_numpy(dtype=np.float64)
+                                                               / df['number_of_profiles'].to_numpy(dtype=np.float64))
+        if "subscription_price" in self.index:
+            X[:, self.index["subscription_price"]] = df['subscription_type'].map(self.price_map).to_numpy(dtype=np.float64)
+
+        # One-hot: categories outside the model's dummies (incl. reference levels) stay all-zero
+        rows = np.arange(n_rows)
+        for col, (categories, feature_idx) in self.dummy_columns.items():
+            if col not in df.columns:
+                continue
+            codes = categories.get_indexer(df[col])
+            known = codes >= 0
+            X[rows[known], feature_idx[codes[known]]] = 1.0
+
+        return X
+
+    def encode_one(self, profile: dict) -> np.ndarray:
+        """
+        Encode one customer given as a dict of raw columns into a (1, n_features)
+        float32 row, without building a DataFrame. Same values as encode().
+        """
+        x = np.zeros((1, len(self.feature_names)), dtype=np.float32)
+        row = x[0]
+
+        for name, i in self.numeric_columns:
+            if name in profile:
+                row[i] = profile[name]
+
+        # numpy scalars, so a zero divisor gives inf as in encode() instead of raising
+        for col, i, bounds in self.derived:
+            value = np.float64(profile[col])
+            row[i] = min(max(value, bounds[0]), bounds[1]) if bounds is not None else np.log1p(value)
+        if "avg_watch_time_per_profile" in self.index:
+            row[self.index["avg_watch_time_per_profile"]] = (np.float64(profile['avg_watch_time_per_day'])
+                                                             / np.float64(profile['number_of_profiles']))
+        if "subscription_price" in self.index:
+            row[self.index["subscription_price"]] = self.price_map.get(profile['subscription_type'], np.nan)
+
+        for col, lookup in self.dummy_lookup.items():
+            i = lookup.get(profile.get(col))
+            if i is not None:
+                row[i] = 1.0
+
+        return x
+
+
+def get_churn_encoder() -> ChurnFeatureEncoder:
+    return registry.component("churn_encoder",
+                              lambda: ChurnFeatureEncoder(get_gb_features(), churn_categorical_cols,
+                                                          get_churn_transform()))
 
 def preprocess_churn(df: pd.DataFrame) -> pd.DataFrame:
     """
     Preprocess user input to match model features.
     Includes feature engineering, one-hot encoding, and column alignment.
+    The input frame is not modified.
     """
-    # Feature engineering
-    df['avg_watch_time_per_profile'] = df['avg_watch_time_per_day'] / df['number_of_profiles']
-    subscription_price_map = {"Basic": 8.99, "Standard": 13.99, "Premium": 17.99}
-    df['subscription_price'] = df['subscription_type'].map(subscription_price_map)
+    encoder = get_churn_encoder()
+    with metrics.stage("churn.preprocess", len(df)):
+        return pd.DataFrame(encoder.encode(df), columns=encoder.feature_names, index=df.index, copy=False)
+
+# Raw customer columns the churn model needs
+INPUT_COLUMNS = ["age", "gender", "subscription_type", "watch_hours", "last_login_days",
+                 "region", "device", "payment_method", "number_of_profiles",
+                 "avg_watch_time_per_day", "favorite_genre"]
 
-    # One-hot encode categorical features
-    df = pd.get_dummies(df, columns=['payment_method','region','device','favorite_genre'], drop_first=True)
+# Inference engines: "sklearn" calls gb_model directly, "compiled" uses the
+# array-backed CompiledGradientBoosting (built on first use)
+CHURN_ENGINES = ("sklearn", "compiled")
 
-    # Drop redundant columns
-    drop_cols = ['age','gender','subscription_type']
-    df = df.drop(columns=[col for col in drop_cols if col in df.columns], errors='ignore')
+def get_compiled_model() -> CompiledGradientBoosting:
+    return registry.component("compiled_gb_model", lambda: CompiledGradientBoosting(get_gb_model()))
 
-    # Ensure same column order as model training
-    for col in gb_features:
-        if col not in df.columns:
-            df[col] = 0
-    df = df[gb_features]
+def predict_churn_batch(df: pd.DataFrame, engine: str = "sklearn") -> pd.DataFrame:
+    """
+    Predict churn for every row of a DataFrame in one model call.
+    Returns a DataFrame aligned to df.index with 'predicted_class' (0/1)
+    and 'churn_probability' (percent, rounded to 2 decimals).
+    """
+    X_proc = preprocess_churn(df)
+    return churn_from_features(X_proc, df.index, engine=engine)
+
+def churn_from_features(X_proc: pd.DataFrame, index: pd.Index, engine: str = "sklearn") -> pd.DataFrame:
+    """
+    Run the churn model on already preprocessed features (see preprocess_churn).
+    """
+    if engine not in CHURN_ENGINES:
+        raise ValueError(f"Unknown churn engine '{engine}'. Expected one of {CHURN_ENGINES}.")
+    with metrics.stage("churn.model", len(X_proc)):
+        if engine == "compiled":
+            proba = get_compiled_model().predict_proba(X_proc.to_numpy())
+        else:
+            proba = get_gb_model().predict_proba(X_proc)
+
+    # Same decision rule as gb_model.predict, without a second pass over the trees
+    pred_class = get_gb_model().classes_.take(np.argmax(proba, axis=1))
 
-    return df
+    return pd.DataFrame({
+        "predicted_class": pred_class.astype(int),
+        "churn_probability": np.round(proba[:, 1] * 100, 2)
+    }, index=index)
 
-def predict_churn(user_df: pd.DataFrame) -> dict:
+def predict_churn(user_df: pd.DataFrame, engine: str = "sklearn") -> dict:
     """
     Predict churn class and probability.
     Returns a dictionary: {'predicted_class': 0/1, 'churn_probability': float}
+    Pass engine="compiled" for the low-latency array-backed model.
+    """
+    result = predict_churn_batch(user_df, engine=engine).iloc[0]
+
+    return {
+        "predicted_class": int(result["predicted_class"]),
+        "churn_probability": float(result["churn_probability"])
+    }
+
+def predict_churn_profile(profile: dict, engine: str = "compiled") -> dict:
+    """
+    predict_churn for one customer given as a dict of the raw INPUT_COLUMNS:
+    the dict is encoded straight into a feature row, skipping pandas, which
+    dominates the cost of a single prediction. Same results as predict_churn.
     """
-    X_proc = preprocess_churn(user_df)
-    pred_class = gb_model.predict(X_proc)[0]
-    pred_prob = gb_model.predict_proba(X_proc)[0][1]
+    if engine not in CHURN_ENGINES:
+        raise ValueError(f"Unknown churn engine '{engine}'. Expected one of {CHURN_ENGINES}.")
+    encoder = get_churn_encoder()
+    with metrics.stage("churn.preprocess", 1):
+        x = encoder.encode_one(profile)
+    with metrics.stage("churn.model", 1):
+        if engine == "compiled":
+            proba = get_compiled_model().predict_proba(x)[0]
+        else:
+            # gb_model was fitted on named columns
+            proba = get_gb_model().predict_proba(pd.DataFrame(x, columns=encoder.feature_names))[0]
 
     return {
-        "predicted_class": int(pred_class),
-        "churn_probability": round(pred_prob*100, 2)
+        "predicted_class": int(get_gb_model().classes_[np.argmax(proba)]),
+        "churn_probability": float(np.round(proba[1] * 100, 2))
     }
 
 # Example usage
@@ -1,4 +1,122 @@
 # recommendation.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_registry import registry
+from segmentation import SEGMENTATION_ARTIFACTS
+from metrics import metrics
+
+# Offer rules live in models/recommendation_rules.json so they can be tuned
+# without code changes; RECOMMENDATION_RULES points at an alternative file.
+# The override is served through the registry, so editing it counts as a
+# model change (caches are invalidated and the engine is rebuilt).
+RULES_FILE = "recommendation_rules.json"
+if os.environ.get("RECOMMENDATION_RULES"):
+    registry.add_file(RULES_FILE, os.environ["RECOMMENDATION_RULES"])
+
+
+class RecommendationEngine:
+    """
+    Declarative offer rules compiled into vectorized masks.
+    Rules are checked in order and the first match wins. A rule matches when
+    min_churn_prob < churn_prob <= max_churn_prob (either bound optional)
+    and, when listed, the subscription type (case-insensitive) and the
+    segment match. Rows matching no rule get default_offer.
+    Segments are named by title ("segment_titles") and resolved to KMeans
+    ids through segments (the "segments" list of segments.json), so a rule
+    cannot silently point at another cluster after a retrain; unknown titles
+    or ids raise ValueError.
+    """
+
+    def __init__(self, config: dict, segments: list = None):
+        self.rules = config["rules"]
+        self.default_offer = config["default_offer"]
+        self._segments = [self._resolve_segments(rule, segments) for rule in self.rules]
+
+        # Fixed offer set: rule offers in order, then the default
+        self.offers = list(dict.fromkeys([rule["offer"] for rule in self.rules] + [self.default_offer]))
+        self._offer_codes = [self.offers.index(rule["offer"]) for rule in self.rules]
+        self._default_code = self.offers.index(self.default_offer)
+        self._subscriptions = [
+            [s.lower() for s in rule["subscription_types"]] if "subscription_types" in rule else None
+            for rule in self.rules
+        ]
+
+    @staticmethod
+    def _resolve_segments(rule: dict, segments: list):
+        """Segment ids a rule is limited to, or None for any segment."""
+        if "segment_titles" not in rule and "segments" not in rule:
+            return None
+        if segments is None:
+            raise ValueError(f"Rule '{rule['offer']}' targets segments, but no segments.json was given.")
+        ids = {segment["title"]: segment["id"] for segment in segments}
+        unknown = [title for title in rule.get("segment_titles", []) if title not in ids]
+        unknown += [segment for segment in rule.get("segments", []) if segment not in ids.values()]
+        if unknown:
+            raise ValueError(f"Rule '{rule['offer']}' names segments {unknown} that are not in segments.json "
+                             f"(known: {sorted(ids)}); update the rules after retraining the segmentation.")
+        return [ids[title] for title in rule.get("segment_titles", [])] + list(rule.get("segments", []))
+
+    @classmethod
+    def from_file(cls, path: str, segments: list = None) -> "RecommendationEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), segments)
+
+    def recommend(self, segment, churn_prob: float, subscription_type: str) -> str:
+        """Offer for a single customer (same rules, without array overhead)."""
+        subscription = str(subscription_type).lower()
+        for rule, subscriptions, segments in zip(self.rules, self._subscriptions, self._segments):
+            if "min_churn_prob" in rule and not churn_prob > rule["min_churn_prob"]:
+                continue
+            if "max_churn_prob" in rule and not churn_prob <= rule["max_churn_prob"]:
+                continue
+            if subscriptions is not None and subscription not in subscriptions:
+                continue
+            if segments is not None and segment not in segments:
+                continue
+            return rule["offer"]
+        return self.default_offer
+
+    def recommend_batch(self, segment, churn_prob, subscription_type) -> pd.Categorical:
+        """Offer for every row, as a Categorical over self.offers."""
+        with metrics.stage("recommend", len(churn_prob)):
+            return self._recommend_batch(segment, churn_prob, subscription_type)
+
+    def _recommend_batch(self, segment, churn_prob, subscription_type) -> pd.Categorical:
+        churn_prob = np.asarray(churn_prob, dtype=np.float64)
+        segment = np.asarray(segment)
+        # Match subscription types on the (few) categories, then select rows by code
+        subscription = pd.Categorical(subscription_type)
+        categories = subscription.categories.astype(str).str.lower()
+
+        conditions = []
+        for rule, subscriptions, segments in zip(self.rules, self._subscriptions, self._segments):
+            mask = np.ones(churn_prob.shape, dtype=bool)
+            if "min_churn_prob" in rule:
+                mask &= churn_prob > rule["min_churn_prob"]
+            if "max_churn_prob" in rule:
+                mask &= churn_prob <= rule["max_churn_prob"]
+            if subscriptions is not None:
+                mask &= np.isin(subscription.codes, np.flatnonzero(categories.isin(subscriptions)))
+            if segments is not None:
+                mask &= np.isin(segment, segments)
+            conditions.append(mask)
+
+        codes = np.select(conditions, self._offer_codes, default=self._default_code) if conditions \
+            else np.full(churn_prob.shape, self._default_code)
+        return pd.Categorical.from_codes(codes.astype(np.int8), categories=self.offers)
+
+
+def get_recommendation_engine() -> RecommendationEngine:
+    def build():
+        segments = registry.get(SEGMENTATION_ARTIFACTS["segments"])["segments"]
+        return RecommendationEngine(registry.get(RULES_FILE), segments)
+    return registry.component("recommendation_engine", build)
+
+
 def recommend_offer(segment, churn_prob, subscription_type):
     """
     Generate a basic recommendation based on churn probability, customer segment, and subscription type.
@@ -10,22 +128,4 @@ def recommend_offer(segment, churn_prob, subscription_type):
     if isinstance(churn_prob, str):
         churn_prob = float(churn_prob)
 
-    recommendation = ""
-
-    # Rule-based recommendations
-    if churn_prob > 70:
-        if subscription_type.lower() == "basic":
-            recommendation = "🎁 Offer a 30% discount on Premium upgrade to retain the customer."
-        elif subscription_type.lower() == "premium":
-            recommendation = "💎 Provide personalized content suggestions and loyalty rewards."
-        else:
-            recommendation = "🪄 Send retention offer email with special discounts."
-    elif 40 < churn_prob <= 70:
-        if str(segment).lower() == "power":
-            recommendation = "🚀 Give early access to new features or exclusive add-ons."
-        else:
-            recommendation = "😊 Send gentle reminders or appreciation messages to engage."
-    else:
-        recommendation = "✅ Continue current plan and maintain engagement with occasional perks."
-
-    return recommendation  # 👈 only return the string now
+    return get_recommendation_engine().recommend(segment, churn_prob, subscription_type)
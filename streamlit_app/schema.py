@@ -0,0 +1,83 @@
+# schema.py
+import numpy as np
+import pandas as pd
+
+from recommendation import get_recommendation_engine
+
+# --- Input schema for uploaded customer files ---
+CATEGORICAL_COLUMNS = ['gender', 'region', 'device', 'payment_method', 'favorite_genre', 'subscription_type']
+
+# Integer columns are read by the CSV parser first and narrowed afterwards, so
+# a missing value falls back to float32 instead of failing the upload
+INTEGER_COLUMNS = {
+    'age': np.int8,
+    'number_of_profiles': np.int8,
+    'last_login_days': np.int16,
+    'churned': np.int8,
+}
+FLOAT_COLUMNS = ['watch_hours', 'avg_watch_time_per_day', 'monthly_fee']
+
+# dtype= argument for pd.read_csv (columns absent from a file are ignored)
+CSV_DTYPES = {**{col: 'category' for col in CATEGORICAL_COLUMNS}, **{col: 'float32' for col in FLOAT_COLUMNS}}
+
+# --- Output schema for scored batches ---
+OUTPUT_DTYPES = {
+    'segment': np.int8,
+    'churn_prob': np.float32,
+    'revenue_loss': np.float32,
+    'churn_prob_after': np.float32,
+}
+
+
+def recommendation_dtype() -> pd.CategoricalDtype:
+    """Categorical over every offer the configured recommendation rules can return."""
+    return pd.CategoricalDtype(get_recommendation_engine().offers)
+
+
+def _narrow_integer(series: pd.Series, dtype) -> pd.Series:
+    """
+    Cast to the declared integer type when the values allow it, else to
+    float32, or to float64 where float32 would round (beyond 2**24).
+    """
+    if not pd.api.types.is_numeric_dtype(series):
+        return series
+    info = np.iinfo(dtype)
+    values = series.to_numpy()
+    if (series.notna().all() and (values % 1 == 0).all()
+            and (len(values) == 0 or (values.min() >= info.min and values.max() <= info.max))):
+        return series.astype(dtype)
+    narrowed = series.astype(np.float32)
+    if not np.array_equal(narrowed.to_numpy(dtype=np.float64), values.astype(np.float64), equal_nan=True):
+        return series.astype(np.float64)
+    return narrowed
+
+
+def apply_input_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert an uploaded customer frame to the compact input schema, in place."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns:
+            df[col] = _narrow_integer(df[col], dtype)
+    return df
+
+
+def read_customers_csv(source, **kwargs) -> pd.DataFrame:
+    """pd.read_csv with the compact input schema applied."""
+    return apply_input_schema(pd.read_csv(source, dtype=CSV_DTYPES, **kwargs))
+
+
+def apply_output_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the prediction columns of a scored batch to the compact output schema, in place."""
+    for col, dtype in OUTPUT_DTYPES.items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    if 'recommendation' in df.columns:
+        df['recommendation'] = df['recommendation'].astype(recommendation_dtype())
+    if 'monthly_revenue' in df.columns:
+        df['monthly_revenue'] = pd.to_numeric(df['monthly_revenue'], downcast='integer')
+    return df
@@ -0,0 +1,107 @@
+# score.py
+"""
+Headless batch scorer: segment, churn probability and recommendation for
+every customer in a CSV, Parquet or Arrow IPC file, without Streamlit.
+
+    python -m streamlit_app.score in.csv out.parquet
+    python streamlit_app/score.py in.parquet out.csv --workers 8
+"""
+import os
+import sys
+import argparse
+import time
+
+# Sibling modules import each other by plain name, as under `streamlit run app.py`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pipeline import ScoringPipeline
+from prediction import CHURN_ENGINES, CHURN_ARTIFACTS
+from segmentation import SEGMENTATION_ARTIFACTS
+from model_registry import registry
+from schema import apply_output_schema
+from batch_io import ARROW_AVAILABLE, file_format, read_customers, write_results
+from metrics import metrics
+
+# file_format() name -> batch_io export format
+OUTPUT_FORMATS = {"csv": "CSV", "parquet": "Parquet", "arrow": "Arrow IPC"}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score customers for segment, churn risk and recommended offer.")
+    parser.add_argument("input", help="Input .csv, .parquet or .arrow/.feather file")
+    parser.add_argument("output", help="Output .csv, .parquet or .arrow file")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream a CSV input in chunks of this many rows (bounded memory, CSV output only)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for in-memory scoring")
+    parser.add_argument("--engine", choices=CHURN_ENGINES, default="sklearn", help="Churn model inference engine")
+    parser.add_argument("--metrics", default=None,
+                        help="Write stage metrics to this file (Prometheus text for .prom, JSON otherwise)")
+    args = parser.parse_args(argv)
+
+    uses_arrow = file_format(args.input) != "csv" or file_format(args.output) != "csv"
+    if args.chunksize and uses_arrow:
+        parser.error("--chunksize streams CSV to CSV; use in-memory scoring for Parquet/Arrow files")
+    if uses_arrow and not ARROW_AVAILABLE:
+        # Fail before scoring rather than after
+        parser.error("Parquet/Arrow files need pyarrow (pip install pyarrow)")
+
+    pipeline = ScoringPipeline(churn_engine=args.engine)
+    metrics.begin_run(args.input)
+    started = time.perf_counter()
+    with metrics.stage("load models"):
+        registry.preload(CHURN_ARTIFACTS + list(SEGMENTATION_ARTIFACTS.values()))
+    # Throughput covers reading, scoring and writing; model loading is a one-off reported on its own
+    load_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+
+    if args.chunksize:
+        rows = pipeline.score_stream(args.input, args.output, chunksize=args.chunksize)["rows"]
+    else:
+        df = read_customers(args.input)
+
+        if args.workers > 1:
+            from parallel import ParallelScorer
+            with ParallelScorer(workers=args.workers, churn_engine=args.engine) as scorer:
+                scores = scorer.score(df)
+        else:
+            scores = pipeline.score(df)
+
+        for col in ScoringPipeline.output_columns:
+            df[col] = scores[col]
+        apply_output_schema(df)
+
+        write_results(df, args.output, OUTPUT_FORMATS[file_format(args.output)])
+        rows = len(df)
+
+    total = time.perf_counter() - started
+    print(f"Loaded models in {load_seconds:.2f}s")
+    print(f"Scored {rows:,} rows in {total:.2f}s ({rows / total if total else 0:,.0f} rows/sec) -> {args.output}")
+    if metrics.enabled:
+        print(metrics.report())
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"  peak RSS             {peak:8.1f} MB")
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            f.write(metrics.to_prometheus() if args.metrics.endswith(".prom") else metrics.to_json())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,52 @@
 import pandas as pd
 import numpy as np
-import joblib
-import json
-import os
 
-# --- Paths ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_DIR = os.path.join(BASE_DIR, "..", "models")  # adjust if needed
+from model_registry import registry
+from metrics import metrics
 
-# --- Load saved models and files ---
-kmeans_model = joblib.load(os.path.join(MODEL_DIR, "kmeans_segmentation_model.joblib"))
-scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.joblib"))
-encoder = joblib.load(os.path.join(MODEL_DIR, "encoder.joblib"))
-pca = joblib.load(os.path.join(MODEL_DIR, "pca.joblib"))
+# --- Saved models and files (loaded lazily through the shared registry) ---
+SEGMENTATION_ARTIFACTS = {
+    "kmeans_model": "kmeans_segmentation_model.joblib",
+    "scaler": "scaler.joblib",
+    "encoder": "encoder.joblib",
+    "pca": "pca.joblib",
+    "expected_features": "kmeans_features.json",
+    "segments": "segments.json",
+}
 
-with open(os.path.join(MODEL_DIR, "kmeans_features.json"), "r") as f:
-    expected_features = json.load(f)
+def __getattr__(name):
+    # Keep `segmentation.scaler` etc. working without import-time loads
+    if name in SEGMENTATION_ARTIFACTS:
+        return registry.get(SEGMENTATION_ARTIFACTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- Feature groups (order matches scaler / encoder training) ---
+numeric_cols = ['age', 'watch_hours', 'last_login_days', 'number_of_profiles',
+                'avg_watch_time_per_day', 'watch_hours_per_profile']
+categorical_cols = ['subscription_type', 'device', 'gender', 'favorite_genre', 'payment_method', 'region']
 
 # --- Preprocessing function ---
+def numeric_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The scaler's input columns (on a new frame, so the caller's data is left untouched)."""
+    features = df[numeric_cols[:-1]].copy()
+    features['watch_hours_per_profile'] = df['watch_hours'] / df['number_of_profiles'].replace(0, 1)
+    return features
+
 def preprocess_input(df: pd.DataFrame) -> np.ndarray:
     """Preprocess input dataframe to match training features and apply PCA."""
 
-    # Feature engineering
-    df['watch_hours_per_profile'] = df['watch_hours'] / df['number_of_profiles'].replace(0, 1)
-
-    # Numeric columns
-    numeric_cols = ['age', 'watch_hours', 'last_login_days', 'number_of_profiles', 
-                    'avg_watch_time_per_day', 'watch_hours_per_profile']
-    df_num_scaled = scaler.transform(df[numeric_cols])
-
-    # Categorical columns
-    categorical_cols = ['subscription_type', 'device', 'gender', 'favorite_genre', 'payment_method', 'region']
+    features = numeric_features(df)
+    scaler = registry.get(SEGMENTATION_ARTIFACTS["scaler"])
+    encoder = registry.get(SEGMENTATION_ARTIFACTS["encoder"])
+    pca = registry.get(SEGMENTATION_ARTIFACTS["pca"])
+    df_num_scaled = scaler.transform(features)
 
-    # Handle unknown categories by ignoring them
-    df_cat_encoded = encoder.transform(df[categorical_cols].apply(lambda x: x.where(x.isin(encoder.categories_[categorical_cols.index(x.name)]), 'Other')))
+    # Handle unknown categories by mapping them to 'Other' (one whole column at a time)
+    df_cat = pd.DataFrame({
+        col: df[col].where(df[col].isin(categories), 'Other')
+        for col, categories in zip(categorical_cols, encoder.categories_)
+    }, index=df.index)
+    df_cat_encoded = encoder.transform(df_cat)
 
     # Combine numeric and categorical features
     X_combined = np.hstack([df_num_scaled, df_cat_encoded])
@@ -44,9 +57,120 @@ def preprocess_input(df: pd.DataFrame) -> np.ndarray:
     return X_pca
 
 
+# --- Precomputed projector ---
+class SegmentationProjector:
+    """
+    The scaler -> one-hot -> hstack -> PCA chain is affine, so it collapses
+    into one numeric weight matrix, one bias and a per-category table of PCA
+    contributions. Projection becomes a matmul plus a gather-add, and KMeans
+    assignment uses precomputed centroid norms. Without a KMeans model it
+    only projects (as segmentation training does).
+    """
+
+    def __init__(self, scaler, encoder, pca, kmeans_model=None):
+        components = pca.components_.T  # (n_inputs, n_components)
+        n_num = len(numeric_cols)
+        center = scaler.center_ if scaler.with_centering else np.zeros(n_num)
+        scale = scaler.scale_ if scaler.with_scaling else np.ones(n_num)
+
+        # ((x - center) / scale - mean_num) @ W_num  ==  x @ weight + const
+        self.weight = components[:n_num] / scale[:, None]
+        self.bias = -(center / scale) @ components[:n_num] - pca.mean_ @ components
+
+        # One table of one-hot contributions per categorical column, plus a row at
+        # the end for categories the encoder has never seen (and NaN). As in
+        # preprocess_input, those count as 'Other' where the encoder has that
+        # category, and encode as all zeros otherwise.
+        self.categories = []
+        self.category_tables = []
+        start = n_num
+        for categories in encoder.categories_:
+            table = components[start:start + len(categories)]
+            categories = pd.Index(categories)
+            unknown = table[categories.get_loc('Other')] if 'Other' in categories else np.zeros(table.shape[1])
+            self.categories.append(categories)
+            self.category_tables.append(np.vstack([table, unknown]))
+            start += len(categories)
+        # category -> table row per column, for transform_one (misses use the last row)
+        self.category_codes = [{category: code for code, category in enumerate(categories)}
+                               for categories in self.categories]
+
+        if kmeans_model is not None:
+            self.centroids = kmeans_model.cluster_centers_
+            self.centroid_sq_norms = (self.centroids ** 2).sum(axis=1)
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Project raw customer rows into PCA space (same result as preprocess_input)."""
+        X_num = np.column_stack([
+            df['age'].to_numpy(dtype=np.float64),
+            df['watch_hours'].to_numpy(dtype=np.float64),
+            df['last_login_days'].to_numpy(dtype=np.float64),
+            df['number_of_profiles'].to_numpy(dtype=np.float64),
+            df['avg_watch_time_per_day'].to_numpy(dtype=np.float64),
+            df['watch_hours'].to_numpy(dtype=np.float64)
+            / df['number_of_profiles'].replace(0, 1).to_numpy(dtype=np.float64),
+        ])
+        X_pca = X_num @ self.weight + self.bias
+
+        for col, categories, table in zip(categorical_cols, self.categories, self.category_tables):
+            codes = categories.get_indexer(df[col])  # -1 (unknown) selects the last row
+            X_pca += table[codes]
+
+        return X_pca
+
+    def transform_one(self, profile: dict) -> np.ndarray:
+        """transform() for one customer given as a dict, as a (1, n_components) row, without pandas."""
+        number_of_profiles = profile['number_of_profiles']
+        x_num = np.array([profile['age'], profile['watch_hours'], profile['last_login_days'], number_of_profiles,
+                          profile['avg_watch_time_per_day'],
+                          profile['watch_hours'] / (number_of_profiles if number_of_profiles != 0 else 1)],
+                         dtype=np.float64)
+        x_pca = x_num @ self.weight + self.bias
+
+        for col, codes, table in zip(categorical_cols, self.category_codes, self.category_tables):
+            x_pca += table[codes.get(profile[col], -1)]
+
+        return x_pca[None, :]
+
+    def predict(self, X_pca: np.ndarray) -> np.ndarray:
+        """Nearest centroid: argmin of ||c||^2 - 2 x.c (||x||^2 is constant per row)."""
+        distances = self.centroid_sq_norms - 2.0 * (X_pca @ self.centroids.T)
+        return np.argmin(distances, axis=1).astype(np.int32)
+
+
+def get_segmentation_projector() -> SegmentationProjector:
+    def build():
+        load = lambda name: registry.get(SEGMENTATION_ARTIFACTS[name])
+        return SegmentationProjector(load("scaler"), load("encoder"), load("pca"), load("kmeans_model"))
+    return registry.component("segmentation_projector", build)
+
+
+def get_segment_labels() -> dict:
+    """Segment id -> {"title", "description"} for the saved KMeans model."""
+    return {segment["id"]: {"title": segment["title"], "description": segment["description"]}
+            for segment in registry.get(SEGMENTATION_ARTIFACTS["segments"])["segments"]}
+
+
 # --- Cluster prediction ---
+def assign_clusters(df: pd.DataFrame) -> np.ndarray:
+    """Predict KMeans clusters for every row of a dataframe in one pass."""
+    projector = get_segmentation_projector()
+    # Scaler, one-hot encoding and PCA are folded into one projection
+    with metrics.stage("segment.project", len(df)):
+        X_pca = projector.transform(df)
+    with metrics.stage("segment.kmeans", len(df)):
+        return projector.predict(X_pca)
+
+
+def assign_profile(profile: dict) -> int:
+    """Predict the KMeans cluster of one customer given as a dict of raw columns."""
+    projector = get_segmentation_projector()
+    with metrics.stage("segment.project", 1):
+        x_pca = projector.transform_one(profile)
+    with metrics.stage("segment.kmeans", 1):
+        return int(projector.predict(x_pca)[0])
+
+
 def assign_cluster(df: pd.DataFrame) -> int:
     """Predict KMeans cluster for a new user."""
-    processed_data = preprocess_input(df)
-    cluster = kmeans_model.predict(processed_data)
-    return int(cluster[0])
+    return int(assign_clusters(df)[0])
@@ -0,0 +1,276 @@
+# service.py
+"""
+HTTP scoring service (plain ASGI, no web framework).
+
+    python streamlit_app/service.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+    uvicorn service:app --app-dir streamlit_app
+
+Endpoints:
+    POST /score        one customer profile -> segment, churn probability, recommendation
+    POST /score/batch  {"customers": [...]} -> {"results": [...]} in one vectorized call
+    GET  /health       status and model artifact version
+    GET  /metrics      stage metrics in Prometheus text format
+
+Concurrent /score requests arriving within max_wait_ms of each other are
+coalesced into a single pipeline call of up to max_batch_size rows.
+"""
+import os
+import sys
+import argparse
+import asyncio
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Sibling modules import each other by plain name, as under `streamlit run app.py`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from prediction import INPUT_COLUMNS, CHURN_ARTIFACTS
+from segmentation import SEGMENTATION_ARTIFACTS
+from pipeline import ScoringPipeline
+from model_registry import registry
+from metrics import metrics
+
+NUMERIC_FIELDS = ["age", "watch_hours", "last_login_days", "number_of_profiles", "avg_watch_time_per_day"]
+MAX_BODY_BYTES = 64 * 1024 * 1024
+MAX_BULK_ROWS = int(os.environ.get("SERVICE_MAX_BULK_ROWS", "100000"))
+ROUTES = ("/health", "/metrics", "/score", "/score/batch")
+
+
+def validate_profile(profile) -> dict:
+    """The INPUT_COLUMNS of one customer, or ValueError describing what is wrong."""
+    if not isinstance(profile, dict):
+        raise ValueError("a customer must be a JSON object")
+    missing = [col for col in INPUT_COLUMNS if col not in profile]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    for col in INPUT_COLUMNS:
+        value = profile[col]
+        if col in NUMERIC_FIELDS:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"'{col}' must be a number")
+            # json.loads accepts NaN and Infinity, which the models cannot score
+            if not math.isfinite(value):
+                raise ValueError(f"'{col}' must be finite")
+        elif not isinstance(value, str):
+            raise ValueError(f"'{col}' must be a string")
+    if profile["number_of_profiles"] <= 0:
+        raise ValueError("'number_of_profiles' must be positive")
+    return {col: profile[col] for col in INPUT_COLUMNS}
+
+
+def score_profiles(pipeline: ScoringPipeline, profiles: list) -> list:
+    """Score validated profiles in one vectorized pipeline call."""
+    registry.refresh()
+    scores = pipeline.score(pd.DataFrame(profiles, columns=INPUT_COLUMNS))
+    return [
+        {"segment": int(segment), "churn_probability": float(churn_prob), "recommendation": str(recommendation)}
+        for segment, churn_prob, recommendation in zip(scores["segment"], scores["churn_prob"],
+                                                       scores["recommendation"])
+    ]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batched calls.
+    The first queued item opens a window of max_wait seconds; the batch is
+    dispatched when the window closes or max_batch_size items are queued.
+    handler(items) -> results runs in executor, off the event loop. If a
+    batch fails, its items are retried one by one, so only the bad item
+    gets the error.
+    """
+
+    def __init__(self, handler, max_batch_size: int = 64, max_wait: float = 0.005, executor=None):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.handler, items)
+            except Exception:
+                await self._run_individually(batch)
+                continue
+            metrics.observe("service.batch", time.perf_counter() - start, len(items))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run_individually(self, batch):
+        loop = asyncio.get_running_loop()
+        for item, future in batch:
+            try:
+                result = (await loop.run_in_executor(self.executor, self.handler, [item]))[0]
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+
+class ScoringService:
+    """ASGI application serving the scoring pipeline over HTTP."""
+
+    def __init__(self, max_batch_size: int = 64, max_wait_ms: float = 5.0, churn_engine: str = "sklearn"):
+        self.pipeline = ScoringPipeline(churn_engine=churn_engine)
+        # One model thread: calls are CPU-bound and would only contend for the GIL
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self.batcher = MicroBatcher(lambda profiles: score_profiles(self.pipeline, profiles),
+                                    max_batch_size=max_batch_size, max_wait=max_wait_ms / 1000,
+                                    executor=self.executor)
+
+    async def startup(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, registry.preload,
+                                   CHURN_ARTIFACTS + list(SEGMENTATION_ARTIFACTS.values()))
+        self.batcher.start()
+
+    async def shutdown(self):
+        await self.batcher.stop()
+        self.executor.shutdown(wait=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as exc:
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        try:
+            if path == "/health" and method == "GET":
+                status, body = 200, {"status": "ok", "model_version": registry.refresh()}
+            elif path == "/metrics" and method == "GET":
+                await self._respond(send, 200, metrics.to_prometheus().encode(), b"text/plain; version=0.0.4")
+                return
+            elif path == "/score" and method == "POST":
+                profile = validate_profile(await self._read_json(receive))
+                status, body = 200, await self.batcher.submit(profile)
+            elif path == "/score/batch" and method == "POST":
+                payload = await self._read_json(receive)
+                customers = payload.get("customers") if isinstance(payload, dict) else payload
+                if not isinstance(customers, list):
+                    raise ValueError("expected {\"customers\": [...]} or a JSON array")
+                if len(customers) > MAX_BULK_ROWS:
+                    raise ValueError(f"at most {MAX_BULK_ROWS} customers per request")
+                profiles = [validate_profile(customer) for customer in customers]
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, score_profiles, self.pipeline, profiles) if profiles else []
+                status, body = 200, {"results": results}
+            elif path in ROUTES:
+                status, body = 405, {"error": "method not allowed"}
+            else:
+                status, body = 404, {"error": "not found"}
+        except ValueError as exc:
+            status, body = 422, {"error": str(exc)}
+        except Exception as exc:
+            status, body = 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+        # Fixed label set, so arbitrary URLs cannot create new metric series
+        metrics.count("service_requests", endpoint=path if path in ROUTES else "unknown", status=status)
+        await self._respond(send, status, json.dumps(body).encode(), b"application/json")
+
+    @staticmethod
+    async def _read_json(receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise ValueError("request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        try:
+            return json.loads(b"".join(chunks))
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"invalid JSON: {exc}")
+
+    @staticmethod
+    async def _respond(send, status: int, body: bytes, content_type: bytes):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+# Module-level app for ASGI servers; batching is configured through the environment
+app = ScoringService(max_batch_size=int(os.environ.get("SERVICE_MAX_BATCH_SIZE", "64")),
+                     max_wait_ms=float(os.environ.get("SERVICE_MAX_WAIT_MS", "5")),
+                     churn_engine=os.environ.get("SERVICE_CHURN_ENGINE", "sklearn"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve churn scoring over HTTP with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Most single requests per model call.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="How long the first queued request waits for others to join its batch.")
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], default="sklearn")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        parser.error("serving over HTTP needs an ASGI server (pip install uvicorn)")
+    uvicorn.run(ScoringService(max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                               churn_engine=args.engine),
+                host=args.host, port=args.port, log_level="warning")
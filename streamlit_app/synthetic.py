@@ -0,0 +1,174 @@
+# synthetic.py
+"""
+Synthetic customer files for load testing, calibrated on the raw dataset.
+
+    python streamlit_app/synthetic.py customers_10m.parquet --rows 10000000
+    python streamlit_app/synthetic.py customers_1m.csv --rows 1000000 --seed 7
+
+Rows are generated and written chunk by chunk, so memory stays constant
+whatever the row count. The same seed and chunk size give the same file.
+"""
+import os
+import sys
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+# Sibling modules import each other by plain name, as under `streamlit run app.py`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_io import file_format
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw", "netflix_customer_churn.csv")
+
+# Raw dataset column order
+COLUMNS = ['customer_id', 'age', 'gender', 'subscription_type', 'watch_hours', 'last_login_days', 'region',
+           'device', 'monthly_fee', 'churned', 'payment_method', 'number_of_profiles',
+           'avg_watch_time_per_day', 'favorite_genre']
+CATEGORICAL_COLUMNS = ['gender', 'subscription_type', 'region', 'device', 'payment_method', 'favorite_genre',
+                       'number_of_profiles']
+# Continuous columns drawn jointly (Gaussian copula over empirical quantiles)
+NUMERIC_COLUMNS = ['watch_hours', 'last_login_days', 'age']
+QUANTILES = 1001
+
+# UUID text layout: hex digit positions between the dashes
+_UUID_HEX_SLOTS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+_HEX_PAIRS = np.array([f"{i:02x}" for i in range(256)], dtype="S2")
+
+
+class CustomerGenerator:
+    """
+    Generative model of the raw customer table.
+    Churn is drawn first with the observed rate. Given the churn class, the
+    categorical columns follow their per-class frequencies, and watch hours,
+    days since last login and age are drawn jointly through a Gaussian
+    copula over per-class quantile tables, which keeps their skew and rank
+    correlation. Watch hours are capped at the maximum observed for the
+    number of profiles. Monthly fee follows the subscription type, and
+    avg_watch_time_per_day is derived as in the source data.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.churn_rate = float(df['churned'].mean())
+        self.fees = df.groupby('subscription_type')['monthly_fee'].median().to_dict()
+        self.max_watch_hours = df.groupby('number_of_profiles')['watch_hours'].max()
+
+        # Shared category lists, so every chunk and class has the same dtypes
+        categories = {col: np.sort(df[col].unique()) for col in CATEGORICAL_COLUMNS}
+
+        grid = np.linspace(0, 1, QUANTILES)
+        self.classes = {}
+        for churned, group in df.groupby('churned'):
+            frequencies = {col: group[col].value_counts(normalize=True).reindex(categories[col], fill_value=0.0)
+                           for col in CATEGORICAL_COLUMNS}
+            # Normal scores of the ranks give the copula correlation
+            ranks = group[NUMERIC_COLUMNS].rank(method='average').to_numpy() / (len(group) + 1)
+            self.classes[int(churned)] = {
+                "frequencies": frequencies,
+                "quantiles": np.column_stack([np.quantile(group[col], grid) for col in NUMERIC_COLUMNS]),
+                "cholesky": np.linalg.cholesky(np.corrcoef(ndtri(ranks), rowvar=False)),
+            }
+        self._grid = grid
+
+    @classmethod
+    def from_csv(cls, path: str = DATA_PATH) -> "CustomerGenerator":
+        return cls(pd.read_csv(path))
+
+    def _customer_ids(self, rng: np.random.Generator, rows: int) -> np.ndarray:
+        """Random version-4 UUID strings, formatted without a Python loop."""
+        raw = rng.integers(0, 256, size=(rows, 16), dtype=np.uint8)
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+        text = np.full((rows, 36), b"-", dtype="S1")
+        text[:, _UUID_HEX_SLOTS] = _HEX_PAIRS[raw].view("S1").reshape(rows, 32)
+        return text.view("S36").ravel().astype(str)
+
+    def _sample_class(self, rng: np.random.Generator, params: dict, rows: int) -> dict:
+        columns = {}
+        for col, frequencies in params["frequencies"].items():
+            codes = rng.choice(len(frequencies), size=rows, p=frequencies.to_numpy())
+            if col == 'number_of_profiles':
+                columns[col] = frequencies.index.to_numpy()[codes].astype(np.int64)
+            else:
+                columns[col] = pd.Categorical.from_codes(codes, categories=frequencies.index)
+
+        uniform = ndtr(rng.standard_normal((rows, len(NUMERIC_COLUMNS))) @ params["cholesky"].T)
+        for i, col in enumerate(NUMERIC_COLUMNS):
+            columns[col] = np.interp(uniform[:, i], self._grid, params["quantiles"][:, i])
+        return columns
+
+    def sample(self, rng: np.random.Generator, rows: int) -> pd.DataFrame:
+        """rows synthetic customers in the raw dataset's layout."""
+        churned = (rng.random(rows) < self.churn_rate).astype(np.int64)
+        parts = [pd.DataFrame(self._sample_class(rng, self.classes[c], int((churned == c).sum())))
+                 for c in (0, 1)]
+        df = pd.concat(parts, ignore_index=True)
+        # Interleave the classes instead of leaving them in two blocks
+        order = np.argsort(np.argsort(churned, kind="stable"), kind="stable")
+        df = df.iloc[order].reset_index(drop=True)
+        df['churned'] = churned
+
+        cap = self.max_watch_hours.reindex(df['number_of_profiles']).to_numpy()
+        df['watch_hours'] = np.round(np.clip(df['watch_hours'], 0.01, cap), 2)
+        df['last_login_days'] = np.round(df['last_login_days']).astype(np.int64)
+        df['age'] = np.round(df['age']).astype(np.int64)
+        df['avg_watch_time_per_day'] = np.round(df['watch_hours'] / (df['last_login_days'] + 1), 2)
+        df['monthly_fee'] = df['subscription_type'].map(self.fees).astype(np.float64)
+        df['customer_id'] = self._customer_ids(rng, rows)
+        return df[COLUMNS]
+
+    def generate(self, rows: int, seed: int = 0, chunksize: int = 1_000_000):
+        """Yield DataFrames of at most chunksize rows, rows in total."""
+        rng = np.random.default_rng(seed)
+        for start in range(0, rows, chunksize):
+            yield self.sample(rng, min(chunksize, rows - start))
+
+    def write(self, path: str, rows: int, seed: int = 0, chunksize: int = 1_000_000, on_progress=None) -> int:
+        """
+        Stream rows synthetic customers to a CSV, Parquet or Arrow IPC file
+        (chosen by extension). on_progress(rows_done) is called per chunk.
+        """
+        fmt = file_format(path)
+        writer = None
+        done = 0
+        try:
+            for chunk in self.generate(rows, seed, chunksize):
+                if fmt == "csv":
+                    chunk.to_csv(path, mode="w" if done == 0 else "a", header=done == 0, index=False)
+                else:
+                    import pyarrow as pa
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        if fmt == "parquet":
+                            import pyarrow.parquet as pq
+                            writer = pq.ParquetWriter(path, table.schema)
+                        else:
+                            writer = pa.ipc.new_file(path, table.schema)
+                    writer.write_table(table)
+                done += len(chunk)
+                if on_progress:
+                    on_progress(done)
+        finally:
+            if writer is not None:
+                writer.close()
+        return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic customer file calibrated on the raw dataset.")
+    parser.add_argument("output", help="Output file (.csv, .parquet or .arrow).")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=1_000_000, help="Rows generated and written at a time.")
+    parser.add_argument("--source", default=DATA_PATH, help="CSV the distributions are learned from.")
+    args = parser.parse_args()
+
+    generator = CustomerGenerator.from_csv(args.source)
+    start = time.perf_counter()
+    generator.write(args.output, args.rows, seed=args.seed, chunksize=args.chunksize,
+                    on_progress=lambda done: print(f"\r{done:,} / {args.rows:,} rows", end="", flush=True))
+    elapsed = time.perf_counter() - start
+    print(f"\nWrote {args.rows:,} rows to {args.output} in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
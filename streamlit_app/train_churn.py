@@ -0,0 +1,237 @@
+# train_churn.py
+"""
+Churn model training: the model comparison from notebooks/prediction.ipynb as a script.
+
+    python streamlit_app/train_churn.py
+    python streamlit_app/train_churn.py --jobs 4 --output-dir /tmp/models
+    python streamlit_app/train_churn.py --candidates "Gradient Boosting" "Random Forest"
+
+The train/test split and the feature transform fitted on its training rows
+are cached on disk (keyed by the data file's content and the split
+settings). The feature matrix is built once per run, checked row for row
+against what serving computes, and shared by candidates trained in
+parallel, one per core. The comparison table, timings and the selected
+model's artifacts (gb_churn_model.joblib, gb_features.json,
+churn_transform.json) are written to the output dir.
+"""
+import os
+import sys
+import argparse
+import hashlib
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+# Sibling modules import each other by plain name, as under `streamlit run app.py`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import MODEL_DIR
+from prediction import (ChurnFeatureEncoder, churn_categorical_cols, churn_capped_cols, churn_feature_names,
+                        fit_churn_transform)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "..", "data", "processed", "cleaned_netflix_customer_churn.csv")
+CACHE_DIR = os.path.join(BASE_DIR, "..", ".cache", "churn_training")
+REPORT_FILE = "churn_training_report.json"
+
+# Bump when the cached split's contents change, so it is rebuilt
+FEATURE_VERSION = 2
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+# Candidate name -> estimator factory (settings as in the notebook)
+CANDIDATES = {
+    "Logistic Regression": lambda: LogisticRegression(max_iter=1000, class_weight='balanced', random_state=RANDOM_STATE),
+    "Random Forest": lambda: RandomForestClassifier(n_estimators=200, class_weight='balanced', random_state=RANDOM_STATE),
+    "Decision Tree": lambda: DecisionTreeClassifier(random_state=RANDOM_STATE),
+    # No probability=True: its internal 5-fold Platt calibration dominated the fit time,
+    # and ROC-AUC only needs the ranking given by decision_function
+    "SVM": lambda: SVC(random_state=RANDOM_STATE),
+    "Gradient Boosting": lambda: GradientBoostingClassifier(random_state=RANDOM_STATE),
+}
+# The app needs predict_proba from the served model
+SERVABLE = [name for name in CANDIDATES if name != "SVM"]
+
+
+# --- Features ---
+def build_features(df: pd.DataFrame, transform: dict) -> pd.DataFrame:
+    """
+    Training feature matrix in gb_features.json order, built with pandas as
+    in the notebook but from a fitted transform (see fit_churn_transform).
+    """
+    df = df.copy()
+    for col in churn_capped_cols:
+        lower, upper = transform["iqr_bounds"][col]
+        df[f'{col}_capped'] = df[col].clip(lower=lower, upper=upper)
+        df[f'{col}_log'] = np.log1p(df[col])
+    df['avg_watch_time_per_profile'] = df['avg_watch_time_per_day'] / df['number_of_profiles']
+    df['subscription_price'] = df['subscription_type'].map(transform["subscription_price"])
+
+    # Fixed categories, so every split gets the same dummy columns
+    for col in churn_categorical_cols:
+        df[col] = pd.Categorical(df[col], categories=transform["categories"][col])
+    df = pd.get_dummies(df, columns=['payment_method'], drop_first=True)
+    df = df.drop(columns=['age', 'gender', 'subscription_type', 'churned'], errors='ignore')
+    df = pd.get_dummies(df, columns=['region', 'device', 'favorite_genre'], drop_first=True)
+    return df[churn_feature_names(transform)].astype(np.float64)
+
+
+def check_serving_parity(df: pd.DataFrame, X: pd.DataFrame, transform: dict):
+    """Raise if the serving encoder does not reproduce the training features row for row."""
+    served = ChurnFeatureEncoder(list(X.columns), churn_categorical_cols, transform).encode(df)
+    # Tree models see float32 inputs, which is what the encoder produces
+    mismatched = np.flatnonzero((served != X.to_numpy(dtype=np.float32)).any(axis=1))
+    if len(mismatched):
+        raise AssertionError(f"Serving features differ from training features in {len(mismatched)} rows "
+                             f"(first: {X.index[mismatched[0]]}).")
+
+
+def load_split(data_path: str = DATA_PATH, cache_dir: str = CACHE_DIR,
+               test_size: float = TEST_SIZE, random_state: int = RANDOM_STATE) -> tuple:
+    """
+    (train_df, test_df, transform, cache_hit): the raw rows of the split and
+    the transform fitted on the training rows. Stored in cache_dir under a
+    key covering the data bytes and split settings.
+    """
+    with open(data_path, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(f"{FEATURE_VERSION}:{test_size}:{random_state}".encode())
+    cache_path = os.path.join(cache_dir, f"split-{digest.hexdigest()[:16]}.joblib") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        return (*joblib.load(cache_path), True)
+
+    df = pd.read_csv(data_path)
+    train_df, test_df = train_test_split(df, test_size=test_size, random_state=random_state, stratify=df['churned'])
+    split = (train_df, test_df, fit_churn_transform(train_df))
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        joblib.dump(split, cache_path)
+    return (*split, False)
+
+
+# --- Training ---
+def fit_and_evaluate(name: str, X_train, X_test, y_train, y_test) -> dict:
+    """Fit one candidate and score it on the test split (notebook metrics plus timings)."""
+    model = CANDIDATES[name]()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    scores = model.predict_proba(X_test)[:, 1] if hasattr(model, "predict_proba") else model.decision_function(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    return {
+        "name": name,
+        "model": model,
+        "metrics": {
+            "Accuracy": round(accuracy_score(y_test, y_pred), 4),
+            "Precision": round(precision_score(y_test, y_pred), 4),
+            "Recall": round(recall_score(y_test, y_pred), 4),
+            "F1-Score": round(f1_score(y_test, y_pred), 4),
+            "ROC-AUC": round(roc_auc_score(y_test, scores), 4),
+            "Fit (s)": round(fit_seconds, 3),
+            "Predict (s)": round(predict_seconds, 3),
+        },
+    }
+
+
+def train(candidates=None, data_path: str = DATA_PATH, cache_dir: str = CACHE_DIR, n_jobs: int = -1) -> dict:
+    """Train candidates in parallel on the (cached) split; results plus the comparison table and timings."""
+    started = time.perf_counter()
+    train_df, test_df, transform, cache_hit = load_split(data_path, cache_dir)
+    split_seconds = time.perf_counter() - started
+
+    # Features are built once and shared by every candidate
+    start = time.perf_counter()
+    X_train, X_test = build_features(train_df, transform), build_features(test_df, transform)
+    y_train, y_test = train_df['churned'], test_df['churned']
+    check_serving_parity(train_df, X_train, transform)
+    check_serving_parity(test_df, X_test, transform)
+    feature_seconds = time.perf_counter() - start
+
+    names = list(candidates or CANDIDATES)
+    start = time.perf_counter()
+    results = Parallel(n_jobs=min(n_jobs if n_jobs > 0 else os.cpu_count(), len(names)))(
+        delayed(fit_and_evaluate)(name, X_train, X_test, y_train, y_test) for name in names)
+    fit_seconds = time.perf_counter() - start
+
+    return {
+        "models": {result["name"]: result["model"] for result in results},
+        "comparison": pd.DataFrame({result["name"]: result["metrics"] for result in results}).T,
+        "feature_names": list(X_train.columns),
+        "transform": transform,
+        "timings": {
+            "split_seconds": round(split_seconds, 3),
+            "split_cache_hit": cache_hit,
+            "feature_seconds": round(feature_seconds, 3),
+            "fit_seconds": round(fit_seconds, 3),
+            "total_seconds": round(time.perf_counter() - started, 3),
+        },
+        "rows": {"train": len(X_train), "test": len(X_test)},
+    }
+
+
+def save(run: dict, selected: str, output_dir: str = MODEL_DIR) -> dict:
+    """Write the selected model, its feature list and transform, and the training report; returns the report."""
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(run["models"][selected], os.path.join(output_dir, "gb_churn_model.joblib"))
+    with open(os.path.join(output_dir, "gb_features.json"), "w") as f:
+        json.dump(run["feature_names"], f)
+    with open(os.path.join(output_dir, "churn_transform.json"), "w") as f:
+        json.dump(run["transform"], f, indent=2)
+
+    report = {
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "selected": selected,
+        "rows": run["rows"],
+        "timings": run["timings"],
+        "comparison": run["comparison"].to_dict(orient="index"),
+        "environment": {"python": platform.python_version(), "scikit-learn": sklearn.__version__,
+                        "cpu_count": os.cpu_count()},
+    }
+    with open(os.path.join(output_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and compare churn models, then save the selected one.")
+    parser.add_argument("--data", default=DATA_PATH, help="Cleaned customer CSV with a 'churned' column.")
+    parser.add_argument("--output-dir", default=MODEL_DIR, help="Where the artifacts and report are written.")
+    parser.add_argument("--candidates", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--select", choices=SERVABLE, default="Gradient Boosting",
+                        help="Candidate saved as the served churn model.")
+    parser.add_argument("--jobs", type=int, default=-1, help="Candidates trained at once (-1: one per core).")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Train/test split cache.")
+    parser.add_argument("--no-cache", action="store_true", help="Rebuild features and split without caching.")
+    args = parser.parse_args()
+
+    if args.select not in args.candidates:
+        parser.error(f"--select '{args.select}' is not among --candidates")
+
+    run = train(args.candidates, args.data, None if args.no_cache else args.cache_dir, args.jobs)
+    report = save(run, args.select, args.output_dir)
+
+    timings = run["timings"]
+    print(run["comparison"].to_string())
+    print(f"\nSplit:    {timings['split_seconds']:.2f}s ({'cached' if timings['split_cache_hit'] else 'built'})")
+    print(f"Features: {timings['feature_seconds']:.2f}s (serving parity checked)")
+    print(f"Fit:      {timings['fit_seconds']:.2f}s ({len(args.candidates)} candidates)")
+    print(f"Total:    {timings['total_seconds']:.2f}s")
+    print(f"Saved {args.select} and {REPORT_FILE} to {args.output_dir}")
@@ -0,0 +1,289 @@
+# train_segmentation.py
+"""
+Customer segmentation training: KMeans model selection from notebooks/netflixsegmentation.ipynb as a script.
+
+    python streamlit_app/train_segmentation.py                      # k=4, writes to models/
+    python streamlit_app/train_segmentation.py --k auto --output-dir /tmp/models
+    python streamlit_app/train_segmentation.py --data customers_5m.parquet --minibatch
+
+The scaler, encoder and PCA are fitted once (on at most --fit-sample rows),
+and every customer is projected through the same folded projection used at
+serving time. k is swept in parallel with one KMeans fit per k, scored by
+inertia and a sampled silhouette. The chosen model is taken from the sweep,
+so it is not fitted again. Above MINIBATCH_ROWS customers (or with
+--minibatch) MiniBatchKMeans replaces KMeans.
+
+All segmentation artifacts are written together, including segments.json
+with the segment count, per-segment profiles, titles and the sweep table.
+Nothing is written if the recommendation rules served with them name a
+segment the new model no longer has.
+"""
+import os
+import sys
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import OneHotEncoder, RobustScaler
+
+# Sibling modules import each other by plain name, as under `streamlit run app.py`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_io import file_format
+from model_registry import MODEL_DIR
+from recommendation import RULES_FILE, RecommendationEngine
+from segmentation import (SEGMENTATION_ARTIFACTS, SegmentationProjector, categorical_cols, numeric_cols,
+                          numeric_features)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "..", "data", "processed", "cleaned_netflix_customer_churn.csv")
+
+RANDOM_STATE = 42
+K_RANGE = (2, 10)
+DEFAULT_K = 4                   # what the app's segment labels and recommendation rules were written for
+PCA_VARIANCE = 0.95
+FIT_SAMPLE = 1_000_000          # rows the scaler, encoder and PCA are fitted on, at most
+SILHOUETTE_SAMPLE = 10_000      # silhouette is quadratic in rows, so it is scored on a sample
+MINIBATCH_ROWS = 500_000        # above this, MiniBatchKMeans is used
+MINIBATCH_SIZE = 4096
+
+
+def load_customers(path: str) -> pd.DataFrame:
+    """The segmentation input columns of a CSV, Parquet or Arrow IPC file, at full precision."""
+    columns = numeric_cols[:-1] + categorical_cols
+    fmt = file_format(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    if fmt == "arrow":
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+# --- Preprocessing (fitted once) ---
+def fit_preprocessing(df: pd.DataFrame, fit_sample: int = FIT_SAMPLE) -> tuple:
+    """Fit the scaler, encoder and PCA on (a sample of) df; returns them with the combined feature names."""
+    if len(df) > fit_sample:
+        df = df.sample(fit_sample, random_state=RANDOM_STATE)
+    scaler = RobustScaler()
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown='ignore')
+    X_combined = np.hstack([scaler.fit_transform(numeric_features(df)), encoder.fit_transform(df[categorical_cols])])
+    pca = PCA(n_components=PCA_VARIANCE).fit(X_combined)
+    feature_names = numeric_cols + encoder.get_feature_names_out(categorical_cols).tolist()
+    return scaler, encoder, pca, feature_names
+
+
+# --- k sweep ---
+def fit_k(X_pca: np.ndarray, k: int, minibatch: bool, silhouette_sample: int) -> dict:
+    """One clustering fit for k, with its inertia and sampled silhouette."""
+    start = time.perf_counter()
+    if minibatch:
+        model = MiniBatchKMeans(n_clusters=k, batch_size=MINIBATCH_SIZE, n_init=3, random_state=RANDOM_STATE)
+    else:
+        model = KMeans(n_clusters=k, random_state=RANDOM_STATE)
+    labels = model.fit_predict(X_pca)
+    fit_seconds = time.perf_counter() - start
+
+    silhouette = silhouette_score(X_pca, labels, sample_size=min(silhouette_sample, len(X_pca)),
+                                  random_state=RANDOM_STATE)
+    return {"k": k, "model": model, "labels": labels, "inertia": float(model.inertia_),
+            "silhouette": float(silhouette), "fit_seconds": fit_seconds}
+
+
+def sweep(X_pca: np.ndarray, ks, minibatch: bool, silhouette_sample: int = SILHOUETTE_SAMPLE,
+          n_jobs: int = -1) -> list:
+    """fit_k for every k, in parallel across cores."""
+    n_jobs = min(n_jobs if n_jobs > 0 else os.cpu_count(), len(ks))
+    return Parallel(n_jobs=n_jobs)(delayed(fit_k)(X_pca, k, minibatch, silhouette_sample) for k in ks)
+
+
+# --- Segment profiles and labels ---
+def profile_segments(df: pd.DataFrame, labels: np.ndarray) -> list:
+    """Per-segment size, numeric means and categorical modes, with a generated title and description."""
+    numeric = numeric_features(df)
+    overall = numeric.mean()
+    means = numeric.groupby(labels).mean()
+    modes = {col: df[col].groupby(labels).agg(lambda x: x.value_counts().index[0]) for col in categorical_cols}
+    sizes = np.bincount(labels)
+
+    segments = []
+    for segment, row in means.iterrows():
+        if row['last_login_days'] > 1.15 * overall['last_login_days']:
+            engagement = "Inactive"
+        elif row['watch_hours'] > 1.25 * overall['watch_hours']:
+            engagement = "Power"
+        elif row['last_login_days'] < 0.85 * overall['last_login_days']:
+            engagement = "Active"
+        else:
+            engagement = "Semi-active"
+        subscription, device = modes['subscription_type'][segment], modes['device'][segment]
+        segments.append({
+            "id": int(segment),
+            "title": f"{engagement} {subscription} {device} Users",
+            "description": (f"{sizes[segment] / len(df):.0%} of customers. {row['watch_hours']:.1f} watch hours "
+                            f"on average, last login {row['last_login_days']:.0f} days ago."),
+            "size": int(sizes[segment]),
+            "profile": {**{col: round(float(value), 2) for col, value in row.items()},
+                        **{col: str(modes[col][segment]) for col in categorical_cols}},
+        })
+
+    # Keep titles distinguishable in the app
+    titles = [segment["title"] for segment in segments]
+    for segment in segments:
+        if titles.count(segment["title"]) > 1:
+            segment["title"] += f" (Segment {segment['id']})"
+    return segments
+
+
+def previous_labels(output_dir: str, centroids: np.ndarray) -> dict:
+    """
+    Titles and descriptions from an existing segments.json, if the model in
+    output_dir has the same centroids (so hand-edited labels survive a retrain
+    that reproduces the same segments); otherwise {}.
+    """
+    model_path = os.path.join(output_dir, SEGMENTATION_ARTIFACTS["kmeans_model"])
+    segments_path = os.path.join(output_dir, SEGMENTATION_ARTIFACTS["segments"])
+    if not (os.path.exists(model_path) and os.path.exists(segments_path)):
+        return {}
+    previous = joblib.load(model_path).cluster_centers_
+    if previous.shape != centroids.shape or not np.allclose(previous, centroids):
+        return {}
+    with open(segments_path, "r") as f:
+        return {segment["id"]: segment for segment in json.load(f)["segments"]}
+
+
+# --- Training ---
+def train(df: pd.DataFrame, k="4", k_range=K_RANGE, minibatch: bool = None, fit_sample: int = FIT_SAMPLE,
+          silhouette_sample: int = SILHOUETTE_SAMPLE, n_jobs: int = -1) -> dict:
+    """
+    Fit preprocessing once, sweep k in parallel and pick k (an int, or "auto"
+    for the best silhouette). Returns the fitted objects, segments and timings.
+    """
+    started = time.perf_counter()
+    if minibatch is None:
+        minibatch = len(df) > MINIBATCH_ROWS
+
+    scaler, encoder, pca, feature_names = fit_preprocessing(df, fit_sample)
+    X_pca = SegmentationProjector(scaler, encoder, pca).transform(df)
+    preprocess_seconds = time.perf_counter() - started
+
+    ks = list(range(k_range[0], k_range[1] + 1))
+    if k != "auto" and int(k) not in ks:
+        ks = sorted(ks + [int(k)])
+    start = time.perf_counter()
+    results = sweep(X_pca, ks, minibatch, silhouette_sample, n_jobs)
+    sweep_seconds = time.perf_counter() - start
+
+    chosen = max(results, key=lambda r: r["silhouette"]) if k == "auto" else next(r for r in results if r["k"] == int(k))
+    return {
+        "scaler": scaler,
+        "encoder": encoder,
+        "pca": pca,
+        "kmeans_model": chosen["model"],
+        "feature_names": feature_names,
+        "segments": profile_segments(df, chosen["labels"]),
+        "selection": {"k": chosen["k"], "method": "silhouette" if k == "auto" else "fixed",
+                      "algorithm": "MiniBatchKMeans" if minibatch else "KMeans"},
+        "sweep": [{"k": r["k"], "inertia": round(r["inertia"], 2), "silhouette": round(r["silhouette"], 4),
+                   "fit_seconds": round(r["fit_seconds"], 3)} for r in results],
+        "rows": {"total": len(df), "preprocessing_fit": min(len(df), fit_sample),
+                 "silhouette_sample": min(len(df), silhouette_sample)},
+        "timings": {"preprocess_seconds": round(preprocess_seconds, 3), "sweep_seconds": round(sweep_seconds, 3),
+                    "total_seconds": round(time.perf_counter() - started, 3)},
+    }
+
+
+def check_recommendation_rules(segments: list, output_dir: str):
+    """
+    Raise ValueError if the recommendation rules served with output_dir (the
+    RECOMMENDATION_RULES override, else its recommendation_rules.json) name
+    segments that are not among the new ones.
+    """
+    path = os.environ.get("RECOMMENDATION_RULES") or os.path.join(output_dir, RULES_FILE)
+    if os.path.exists(path):
+        RecommendationEngine.from_file(path, segments)
+
+
+def save(run: dict, output_dir: str = MODEL_DIR) -> dict:
+    """
+    Write every segmentation artifact; returns the segments.json content.
+    Raises ValueError, before anything is written, if the recommendation
+    rules would no longer load against the new segments.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    kept = previous_labels(output_dir, run["kmeans_model"].cluster_centers_)
+    segments = [{**segment, "title": kept[segment["id"]]["title"], "description": kept[segment["id"]]["description"]}
+                if segment["id"] in kept else segment for segment in run["segments"]]
+    check_recommendation_rules(segments, output_dir)
+
+    for name in ("kmeans_model", "scaler", "encoder", "pca"):
+        joblib.dump(run[name], os.path.join(output_dir, SEGMENTATION_ARTIFACTS[name]))
+    with open(os.path.join(output_dir, SEGMENTATION_ARTIFACTS["expected_features"]), "w") as f:
+        json.dump(run["feature_names"], f)
+
+    summary = {
+        "version": 1,
+        "n_segments": len(segments),
+        "segments": segments,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "selection": run["selection"],
+        "sweep": run["sweep"],
+        "rows": run["rows"],
+        "timings": run["timings"],
+        "environment": {"python": platform.python_version(), "scikit-learn": sklearn.__version__,
+                        "cpu_count": os.cpu_count()},
+    }
+    with open(os.path.join(output_dir, SEGMENTATION_ARTIFACTS["segments"]), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the customer segmentation model with a parallel k sweep.")
+    parser.add_argument("--data", default=DATA_PATH, help="Customer file (.csv, .parquet or .arrow).")
+    parser.add_argument("--output-dir", default=MODEL_DIR, help="Where the segmentation artifacts are written.")
+    parser.add_argument("--k", default=str(DEFAULT_K),
+                        help=f"Number of segments, or 'auto' for the best silhouette (default: {DEFAULT_K}).")
+    parser.add_argument("--k-min", type=int, default=K_RANGE[0])
+    parser.add_argument("--k-max", type=int, default=K_RANGE[1])
+    parser.add_argument("--minibatch", action="store_true", default=None,
+                        help=f"Use MiniBatchKMeans (default: above {MINIBATCH_ROWS:,} rows).")
+    parser.add_argument("--fit-sample", type=int, default=FIT_SAMPLE,
+                        help="Rows the scaler, encoder and PCA are fitted on, at most.")
+    parser.add_argument("--silhouette-sample", type=int, default=SILHOUETTE_SAMPLE)
+    parser.add_argument("--jobs", type=int, default=-1, help="k values fitted at once (-1: one per core).")
+    args = parser.parse_args()
+
+    if args.k != "auto" and not args.k.isdigit():
+        parser.error("--k must be a number of segments or 'auto'")
+
+    start = time.perf_counter()
+    df = load_customers(args.data)
+    load_seconds = time.perf_counter() - start
+
+    run = train(df, args.k, (args.k_min, args.k_max), args.minibatch, args.fit_sample, args.silhouette_sample,
+                args.jobs)
+    try:
+        summary = save(run, args.output_dir)
+    except ValueError as exc:
+        sys.exit(f"Not saved: {exc}")
+
+    print(pd.DataFrame(run["sweep"]).set_index("k").to_string())
+    print(f"\nSelected k={summary['n_segments']} ({run['selection']['method']}, {run['selection']['algorithm']})")
+    for segment in summary["segments"]:
+        print(f"  {segment['id']}: {segment['title']:<45} {segment['size']:>10,} customers")
+    timings = run["timings"]
+    print(f"\nLoad:       {load_seconds:.2f}s ({len(df):,} rows)")
+    print(f"Preprocess: {timings['preprocess_seconds']:.2f}s")
+    print(f"Sweep:      {timings['sweep_seconds']:.2f}s ({len(run['sweep'])} values of k)")
+    print(f"Total:      {timings['total_seconds']:.2f}s")
+    print(f"Saved segmentation artifacts to {args.output_dir}")
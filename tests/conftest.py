@@ -0,0 +1,10 @@
+# conftest.py
+import os
+import sys
+import warnings
+
+# The app's modules import each other by plain name, as under `streamlit run app.py`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streamlit_app"))
+
+# Artifacts pickled with an older scikit-learn still load fine
+warnings.filterwarnings("ignore", message="Trying to unpickle estimator")
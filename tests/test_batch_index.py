@@ -0,0 +1,86 @@
+# test_batch_index.py
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_index import RISK_LEVELS, BatchIndex, risk_codes
+
+
+@pytest.fixture(scope="module")
+def batch():
+    rng = np.random.default_rng(3)
+    rows = 500
+    # Probabilities on and around the 30% / 70% band edges, with many ties
+    churn_prob = rng.choice([0.0, 12.5, 29.99, 30.0, 50.0, 70.0, 70.01, 99.0], rows)
+    return pd.DataFrame({
+        "segment": rng.choice([0, 1, 3], rows),
+        "subscription_type": rng.choice(["Basic", "Standard", "Premium", None], rows),
+        "churn_prob": churn_prob,
+        "recommendation": rng.choice(["offer A", "offer B", "offer C"], rows),
+        "watch_hours": rng.choice([1.0, 5.0, 5.0, 20.0], rows),
+        "revenue_loss": rng.uniform(0, 500, rows).astype(np.float32),
+    }, index=rng.permutation(rows) * 2)
+
+
+def pandas_mask(df, risk=None, segment=None, subscription=None):
+    mask = np.ones(len(df), dtype=bool)
+    if risk is not None:
+        mask &= risk_codes(df["churn_prob"]) == risk
+    if segment is not None:
+        mask &= (df["segment"] == segment).to_numpy()
+    if subscription is not None:
+        mask &= (df["subscription_type"] == subscription).to_numpy()
+    return mask
+
+
+# Every combination of no filter, present values and values with no rows
+FILTERS = list(itertools.product([None, 0, 1, 2], [None, 0, 3, 2], [None, "Basic", "Premium", "Ultra"]))
+
+
+@pytest.mark.parametrize("risk, segment, subscription", FILTERS)
+def test_select_matches_boolean_mask(batch, risk, segment, subscription):
+    positions = BatchIndex(batch).select(risk, segment, subscription)
+    np.testing.assert_array_equal(positions, np.flatnonzero(pandas_mask(batch, risk, segment, subscription)))
+
+
+@pytest.mark.parametrize("risk, segment, subscription", FILTERS)
+def test_metrics_match_pandas(batch, risk, segment, subscription):
+    selected = batch[pandas_mask(batch, risk, segment, subscription)]
+    metrics = BatchIndex(batch).metrics(risk, segment, subscription)
+
+    assert metrics["total"] == len(selected)
+    risk_counts = pd.Series(risk_codes(selected["churn_prob"])).value_counts()
+    assert metrics["risk_counts"] == {level: int(risk_counts.get(code, 0)) for code, level in enumerate(RISK_LEVELS)}
+    assert metrics["avg_churn_prob"] == pytest.approx(selected["churn_prob"].mean() if len(selected) else 0.0)
+    assert metrics["revenue_loss"] == pytest.approx(selected["revenue_loss"].to_numpy(dtype=np.float64).sum())
+    offer_counts = selected["recommendation"].value_counts()
+    assert metrics["recommendation_counts"] == {offer: int(offer_counts.get(offer, 0))
+                                                for offer in sorted(batch["recommendation"].unique())}
+
+
+@pytest.mark.parametrize("risk, segment, subscription", [(None, None, None), (None, 0, None), (2, None, "Basic"),
+                                                         (0, 2, None)])
+@pytest.mark.parametrize("column", ["churn_prob", "watch_hours"])
+def test_sort_matches_sort_values(batch, risk, segment, subscription, column):
+    index = BatchIndex(batch)
+    positions = index.select(risk, segment, subscription)
+    order = index.sort(positions, column, batch[column])
+    # Descending, ties kept in row order
+    expected = batch.iloc[positions].reset_index(drop=True)[column].sort_values(ascending=False, kind="stable")
+    np.testing.assert_array_equal(order, positions[expected.index.to_numpy()])
+
+
+def test_sort_order_is_reused_across_filters(batch):
+    index = BatchIndex(batch)
+    index.sort(index.select(), "churn_prob", batch["churn_prob"])
+    # Later calls filter the cached full-batch order, whatever values they pass
+    positions = index.select(segment=1)
+    order = index.sort(positions, "churn_prob", None)
+    assert sorted(order.tolist()) == positions.tolist()
+    assert (np.diff(batch["churn_prob"].to_numpy()[order]) <= 0).all()
+
+
+def test_metrics_without_revenue_figures(batch):
+    assert BatchIndex(batch.drop(columns="revenue_loss")).metrics()["revenue_loss"] == 0.0
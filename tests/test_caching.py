@@ -0,0 +1,75 @@
+# test_caching.py
+import io
+
+import numpy as np
+import pandas as pd
+
+from caching import ResultCache, batch_cache_key
+from model_registry import ModelRegistry
+from test_model_registry import write_artifacts
+
+
+def frame(value, rows=1000):
+    return pd.DataFrame({"churn_prob": np.full(rows, value, dtype=np.float64)})
+
+
+def frame_bytes(value):
+    return int(frame(value).memory_usage(deep=True).sum())
+
+
+def test_batch_key_hashes_a_buffer_view_like_the_bytes():
+    upload = io.BytesIO(b"age,gender\n30,Female\n" * 1000)
+    with upload.getbuffer() as data:
+        key = batch_cache_key(data, "v1")
+    assert key == batch_cache_key(upload.getvalue(), "v1")
+    assert key != batch_cache_key(upload.getvalue(), "v2")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=2 * frame_bytes(0))
+    for key in ("a", "b"):
+        cache.put(key, frame(key == "a"))
+    cache.get("a")  # "b" is now least recently used
+    cache.put("c", frame(2))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_evicted_entries_come_back_from_disk(tmp_path):
+    cache = ResultCache(max_bytes=frame_bytes(0), disk_dir=str(tmp_path))
+    cache.put("a", frame(1))
+    cache.put("b", frame(2))  # evicts "a" from memory only
+    assert cache.stats()["entries"] == 1
+
+    restored = cache.get("a")
+    pd.testing.assert_frame_equal(restored, frame(1))
+    assert cache.stats()["disk_hits"] == 1
+    # Promoted back into memory, which in turn pushes "b" out to disk
+    assert cache.get("a") is restored
+    pd.testing.assert_frame_equal(cache.get("b"), frame(2))
+    assert cache.stats()["disk_hits"] == 2
+
+
+def test_entries_too_large_for_memory_use_disk(tmp_path):
+    cache = ResultCache(max_bytes=frame_bytes(0) // 2, disk_dir=str(tmp_path))
+    cache.put("big", frame(1))
+    assert cache.stats()["entries"] == 0
+    pd.testing.assert_frame_equal(cache.get("big"), frame(1))
+
+
+def test_retrained_models_miss_the_cache(tmp_path):
+    model_dir, disk_dir = tmp_path / "models", tmp_path / "cache"
+    model_dir.mkdir()
+    write_artifacts(model_dir, 1)
+    registry = ModelRegistry(str(model_dir))
+    registry.get("model.joblib")
+    cache = ResultCache(disk_dir=str(disk_dir))
+    upload = b"age,gender\n30,Female\n"
+
+    cache.put(batch_cache_key(upload, registry.refresh()), frame(1))
+    assert cache.get(batch_cache_key(upload, registry.refresh())) is not None
+
+    write_artifacts(model_dir, 2)
+    # Neither tier answers for the same upload once the models are reloaded
+    assert cache.get(batch_cache_key(upload, registry.refresh())) is None
@@ -0,0 +1,51 @@
+# test_churn_features.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction import ChurnFeatureEncoder, churn_categorical_cols, churn_feature_names, fit_churn_transform
+from train_churn import DATA_PATH, build_features
+
+# The edge rows divide by zero and take log1p below -1 on purpose
+pytestmark = pytest.mark.filterwarnings("ignore::RuntimeWarning")
+
+
+@pytest.fixture(scope="module")
+def cleaned():
+    return pd.read_csv(DATA_PATH)
+
+
+@pytest.fixture(scope="module")
+def transform(cleaned):
+    return fit_churn_transform(cleaned)
+
+
+@pytest.fixture(scope="module")
+def customers(cleaned, transform):
+    # Edge rows: no profiles (inf per-profile watch time), values on both sides of
+    # the capping bounds (below the lower one, log1p is NaN), and categories
+    # outside the fitted ones
+    edge = cleaned.iloc[:6].copy()
+    (watch_low, watch_high), (_, daily_high) = (transform["iqr_bounds"][col]
+                                                         for col in ("watch_hours", "avg_watch_time_per_day"))
+    edge["number_of_profiles"] = [0, 1, 2, 3, 4, 5]
+    edge["watch_hours"] = [10.0, watch_high * 10, watch_high, watch_low - 1, 0.0, 25.5]
+    edge["avg_watch_time_per_day"] = [1.0, daily_high * 10, daily_high, 0.0, daily_high + 0.01, 3.0]
+    edge.loc[edge.index[5], churn_categorical_cols] = "Unseen"
+    return pd.concat([cleaned, edge], ignore_index=True)
+
+
+def test_encoder_matches_training_features(customers, transform):
+    expected = build_features(customers, transform).to_numpy(dtype=np.float32)
+    encoded = ChurnFeatureEncoder(churn_feature_names(transform), churn_categorical_cols, transform).encode(customers)
+    assert encoded.shape == expected.shape
+    mismatched = [i for i in range(len(expected)) if not np.array_equal(encoded[i], expected[i], equal_nan=True)]
+    assert not mismatched, f"{len(mismatched)} rows differ, first: {customers.iloc[mismatched[0]].to_dict()}"
+    assert np.isinf(encoded[-6]).any()
+
+
+def test_single_row_encoding_matches_training_features(customers, transform):
+    expected = build_features(customers, transform).to_numpy(dtype=np.float32)
+    encoder = ChurnFeatureEncoder(churn_feature_names(transform), churn_categorical_cols, transform)
+    for i, profile in enumerate(customers.iloc[-200:].to_dict(orient="records"), start=len(customers) - 200):
+        assert np.array_equal(encoder.encode_one(profile)[0], expected[i], equal_nan=True), profile
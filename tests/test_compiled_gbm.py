@@ -0,0 +1,71 @@
+# test_compiled_gbm.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction import (INPUT_COLUMNS, get_compiled_model, get_gb_model, preprocess_churn, predict_churn_batch,
+                        predict_churn_profile)
+from pipeline import ScoringPipeline
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw", "netflix_customer_churn.csv")
+
+
+@pytest.fixture(scope="module")
+def customers():
+    df = pd.read_csv(DATA_PATH)[INPUT_COLUMNS]
+    # Edge rows: values far beyond the capping bounds, categories the model has no dummy for
+    edge = df.iloc[:2].copy()
+    edge.loc[edge.index[0], ["watch_hours", "avg_watch_time_per_day"]] = [1e6, 1e4]
+    edge.loc[edge.index[1], ["region", "device", "payment_method", "favorite_genre"]] = "Unseen"
+    return pd.concat([df, edge], ignore_index=True)
+
+
+def test_compiled_model_matches_sklearn(customers):
+    X = preprocess_churn(customers)
+    np.testing.assert_allclose(get_compiled_model().predict_proba(X.to_numpy()), get_gb_model().predict_proba(X),
+                               rtol=0, atol=1e-12)
+
+
+def test_compiled_model_matches_sklearn_across_blocks(customers):
+    # Sizes around the block boundary, including a single row
+    X = preprocess_churn(customers)
+    compiled = get_compiled_model()
+    for rows in (1, compiled.block_size - 1, compiled.block_size, compiled.block_size + 1):
+        np.testing.assert_allclose(compiled.predict_proba(X.to_numpy()[:rows]), get_gb_model().predict_proba(X[:rows]),
+                                   rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("engine", ["compiled", "sklearn"])
+def test_profile_path_matches_batch(customers, engine):
+    sample = pd.concat([customers.iloc[:200], customers.iloc[-2:]])
+    expected = predict_churn_batch(sample, engine="sklearn")
+    for (_, row), (_, want) in zip(sample.iterrows(), expected.iterrows()):
+        got = predict_churn_profile(row.to_dict(), engine=engine)
+        assert got == {"predicted_class": int(want["predicted_class"]),
+                       "churn_probability": float(want["churn_probability"])}
+
+
+def test_analyze_matches_score(customers):
+    pipeline = ScoringPipeline()
+    sample = pd.concat([customers.iloc[:100], customers.iloc[-2:]])
+    scores = pipeline.score(sample)
+    for (_, row), (_, want) in zip(sample.iterrows(), scores.iterrows()):
+        analysis = pipeline.analyze(row.to_dict())
+        assert (analysis["segment"], analysis["churn_probability"], analysis["recommendation"]) == \
+            (want["segment"], want["churn_prob"], want["recommendation"])
+
+
+# Zero profiles reach the model as inf (with a divide-by-zero warning)
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("column, value, message", [("last_login_days", np.nan, "NaN"),
+                                                    ("number_of_profiles", 0, "infinity")])
+@pytest.mark.parametrize("engine", ["compiled", "sklearn"])
+def test_non_finite_features_are_rejected(customers, engine, column, value, message):
+    sample = customers.iloc[:5].copy()
+    sample.loc[sample.index[2], column] = value
+    with pytest.raises(ValueError, match=message):
+        predict_churn_batch(sample, engine=engine)
+    with pytest.raises(ValueError, match=message):
+        predict_churn_profile(sample.iloc[2].to_dict(), engine=engine)
@@ -0,0 +1,58 @@
+# test_metrics.py
+import re
+
+import pytest
+
+from metrics import Metrics
+
+# metric_name{label="value",...} value
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+@pytest.fixture
+def recorded():
+    metrics = Metrics(buckets=(0.01, 0.1))
+    metrics.observe("churn.model", 0.005, rows=10)
+    metrics.observe("churn.model", 0.05, rows=20)
+    metrics.observe("churn.model", 5.0, rows=30)
+    metrics.count("service_requests", endpoint="/score", status=200)
+    metrics.count("service_requests", endpoint='odd "path"\\\n', status=422)
+    return metrics
+
+
+def test_prometheus_lines_are_well_formed(recorded):
+    text = recorded.to_prometheus()
+    assert text.endswith("\n")
+    for line in text.splitlines():
+        if line.startswith("#"):
+            assert re.match(r"^# (HELP|TYPE) [a-zA-Z_:][a-zA-Z0-9_:]* \S", line), line
+        else:
+            assert SAMPLE.match(line), line
+            float(SAMPLE.match(line).group(4))
+
+
+def test_prometheus_histogram_is_cumulative(recorded):
+    lines = recorded.to_prometheus().splitlines()
+    assert "# TYPE scoring_stage_seconds histogram" in lines
+    assert 'scoring_stage_seconds_bucket{stage="churn.model",le="0.01"} 1' in lines
+    assert 'scoring_stage_seconds_bucket{stage="churn.model",le="0.1"} 2' in lines
+    assert 'scoring_stage_seconds_bucket{stage="churn.model",le="+Inf"} 3' in lines
+    assert 'scoring_stage_seconds_count{stage="churn.model"} 3' in lines
+    assert 'scoring_stage_seconds_sum{stage="churn.model"} 5.055000' in lines
+    assert 'scoring_stage_rows_total{stage="churn.model"} 60' in lines
+
+
+def test_prometheus_counters_escape_labels(recorded):
+    lines = recorded.to_prometheus().splitlines()
+    assert "# TYPE scoring_service_requests_total counter" in lines
+    assert 'scoring_service_requests_total{endpoint="/score",status="200"} 1' in lines
+    assert 'scoring_service_requests_total{endpoint="odd \\"path\\"\\\\\\n",status="422"} 1' in lines
+
+
+def test_prometheus_client_parses_the_exposition(recorded):
+    parser = pytest.importorskip("prometheus_client.parser")
+    families = {family.name: family for family in parser.text_string_to_metric_families(recorded.to_prometheus())}
+    assert families["scoring_stage_seconds"].type == "histogram"
+    assert families["scoring_service_requests"].type == "counter"
+    endpoints = {sample.labels["endpoint"] for sample in families["scoring_service_requests"].samples}
+    assert endpoints == {"/score", 'odd "path"\\\n'}
@@ -0,0 +1,68 @@
+# test_model_registry.py
+import json
+import os
+
+import joblib
+
+from caching import AnalysisMemo
+from model_registry import ModelRegistry
+
+
+def write_artifacts(model_dir, value):
+    joblib.dump({"value": value}, os.path.join(model_dir, "model.joblib"))
+    with open(os.path.join(model_dir, "features.json"), "w") as f:
+        json.dump([value], f)
+    # Distinct mtimes even on coarse-grained filesystems
+    for name in ("model.joblib", "features.json"):
+        os.utime(os.path.join(model_dir, name), ns=(value * 10**9, value * 10**9))
+
+
+def test_refresh_reloads_retrained_artifacts(tmp_path):
+    write_artifacts(tmp_path, 1)
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.get("model.joblib") == {"value": 1}
+    registry.component("derived", lambda: registry.get("features.json")[0] * 10)
+    loaded = registry.refresh()
+
+    write_artifacts(tmp_path, 2)
+    assert registry.version() != loaded
+    # Until refresh(), the models in memory (and their version) are unchanged
+    assert registry.get("model.joblib") == {"value": 1}
+    assert registry.loaded_version == loaded
+
+    assert registry.refresh() == registry.version()
+    assert registry.get("model.joblib") == {"value": 2}
+    assert registry.component("derived", lambda: registry.get("features.json")[0] * 10) == 20
+
+
+def test_analysis_memo_recomputes_with_reloaded_models(tmp_path):
+    write_artifacts(tmp_path, 1)
+    registry = ModelRegistry(str(tmp_path))
+    memo = AnalysisMemo(version_fn=registry.refresh)
+    compute = lambda: registry.get("model.joblib")["value"]
+    assert memo.get_or_compute("customer", compute) == 1
+
+    write_artifacts(tmp_path, 2)
+    assert memo.get_or_compute("customer", compute) == 2
+
+
+def test_added_files_are_served_and_versioned(tmp_path):
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    write_artifacts(model_dir, 1)
+    with open(model_dir / "rules.json", "w") as f:
+        json.dump({"offer": "from models"}, f)
+    override = tmp_path / "override.json"
+    with open(override, "w") as f:
+        json.dump({"offer": "override"}, f)
+
+    registry = ModelRegistry(str(model_dir))
+    registry.add_file("rules.json", str(override))
+    assert registry.get("rules.json") == {"offer": "override"}
+    loaded = registry.refresh()
+
+    with open(override, "w") as f:
+        json.dump({"offer": "edited override"}, f)
+    os.utime(override, ns=(10**9, 10**9))
+    assert registry.refresh() != loaded
+    assert registry.get("rules.json") == {"offer": "edited override"}
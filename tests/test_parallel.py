@@ -0,0 +1,31 @@
+# test_parallel.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parallel import ParallelScorer
+from pipeline import ScoringPipeline
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw", "netflix_customer_churn.csv")
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    with ParallelScorer(workers=2, chunk_size=700) as scorer:
+        yield scorer.start()
+
+
+def test_parallel_scores_match_serial_in_input_order(scorer):
+    # Shuffled, non-default index, so any reordering or realignment would show
+    df = pd.read_csv(DATA_PATH).sample(frac=1, random_state=7)
+    df.index = np.arange(len(df))[::-1] * 3
+    result = scorer.score(df)
+    expected = ScoringPipeline().score(df)
+    assert result.index.equals(df.index)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_start_waits_for_every_worker(scorer):
+    assert len(scorer._pool._processes) == scorer.workers
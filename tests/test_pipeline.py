@@ -0,0 +1,70 @@
+# test_pipeline.py
+import os
+
+import pandas as pd
+import pytest
+
+from pipeline import ScoringPipeline, normalize_profile, profile_key
+from schema import read_customers_csv
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw", "netflix_customer_churn.csv")
+
+PROFILE = {"age": 30, "gender": "Female", "subscription_type": "Basic", "watch_hours": 50,
+           "last_login_days": 5, "region": "Asia", "device": "Mobile", "payment_method": "Credit Card",
+           "number_of_profiles": 2, "avg_watch_time_per_day": 2.5, "favorite_genre": "Drama"}
+
+
+def test_equal_keys_score_equal_inputs():
+    padded = normalize_profile({**PROFILE, "subscription_type": " Basic ", "device": "Mobile "})
+    clean = normalize_profile(PROFILE)
+    assert padded == clean
+    assert profile_key(padded) == profile_key(clean)
+    pipeline = ScoringPipeline()
+    assert pipeline.analyze(padded) == pipeline.analyze(clean)
+
+
+def test_normalized_profile_keeps_only_input_columns():
+    profile = normalize_profile({**PROFILE, "customer_id": "abc"})
+    assert list(profile) == list(PROFILE)
+    assert all(isinstance(profile[col], float) for col in ("age", "watch_hours", "number_of_profiles"))
+
+
+def test_stream_totals_match_scoring_the_whole_frame(tmp_path):
+    output = tmp_path / "scored.csv"
+    progress = []
+    summary = ScoringPipeline().score_stream(DATA_PATH, str(output), chunksize=700,
+                                             on_progress=lambda fraction, rows: progress.append((fraction, rows)))
+
+    df = read_customers_csv(DATA_PATH)
+    churn_prob = ScoringPipeline().score(df)["churn_prob"]
+    assert summary["rows"] == len(df)
+    assert summary["high_risk"] == int((churn_prob > 70).sum())
+    assert summary["medium_risk"] == int(((churn_prob >= 30) & (churn_prob <= 70)).sum())
+    assert summary["avg_churn_prob"] == pytest.approx(churn_prob.mean())
+    assert progress[-1] == (1.0, len(df)) and len(progress) == -(-len(df) // 700)
+
+
+def test_streamed_rows_match_scoring_the_whole_frame(tmp_path):
+    output = tmp_path / "scored.csv"
+    ScoringPipeline().score_stream(DATA_PATH, str(output), chunksize=700)
+    streamed = pd.read_csv(output)
+    expected = ScoringPipeline().score(read_customers_csv(DATA_PATH))
+    assert streamed["segment"].tolist() == expected["segment"].tolist()
+    assert streamed["churn_prob"].tolist() == expected["churn_prob"].tolist()
+    assert streamed["recommendation"].tolist() == expected["recommendation"].astype(str).tolist()
+
+
+def test_score_reads_the_upload_in_place():
+    df = read_customers_csv(DATA_PATH).iloc[:300]
+    before = df.copy()
+    scores = ScoringPipeline().score(df)
+    pd.testing.assert_frame_equal(df, before)
+    # Extra columns are ignored, column order does not matter
+    reordered = df[df.columns[::-1]].assign(customer_note="x")
+    pd.testing.assert_frame_equal(ScoringPipeline().score(reordered), scores)
+
+
+def test_score_rejects_missing_columns():
+    df = read_customers_csv(DATA_PATH).iloc[:10].drop(columns="device")
+    with pytest.raises(KeyError, match="device"):
+        ScoringPipeline().score(df)
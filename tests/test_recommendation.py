@@ -0,0 +1,44 @@
+# test_recommendation.py
+import numpy as np
+import pytest
+
+from model_registry import registry
+from recommendation import RULES_FILE, RecommendationEngine, get_recommendation_engine
+from segmentation import SEGMENTATION_ARTIFACTS
+
+SEGMENTS = [{"id": 0, "title": "Casual Viewers"}, {"id": 1, "title": "Binge Watchers"}]
+RULES = {
+    "default_offer": "default",
+    "rules": [{"min_churn_prob": 40, "segment_titles": ["Binge Watchers"], "offer": "binge"}],
+}
+
+
+def test_segment_titles_resolve_to_ids():
+    engine = RecommendationEngine(RULES, SEGMENTS)
+    assert engine.recommend(1, 50.0, "Basic") == "binge"
+    assert engine.recommend(0, 50.0, "Basic") == "default"
+    assert list(engine.recommend_batch(np.array([0, 1]), np.array([50.0, 50.0]), ["Basic", "Basic"])) == \
+        ["default", "binge"]
+
+
+@pytest.mark.parametrize("rule", [{"segment_titles": ["Power Basic Desktop Users"]}, {"segments": [2]}])
+def test_unknown_segments_fail_at_load(rule):
+    config = {"default_offer": "default", "rules": [{**rule, "offer": "offer"}]}
+    with pytest.raises(ValueError, match="not in segments.json"):
+        RecommendationEngine(config, SEGMENTS)
+
+
+def test_segment_rules_need_segments():
+    with pytest.raises(ValueError, match="no segments.json"):
+        RecommendationEngine(RULES)
+
+
+def test_shipped_rules_load_against_shipped_segments():
+    segments = registry.get(SEGMENTATION_ARTIFACTS["segments"])["segments"]
+    engine = get_recommendation_engine()
+    assert engine.rules == registry.get(RULES_FILE)["rules"]
+    ids = np.repeat([segment["id"] for segment in segments], 3)
+    churn_prob = np.tile([20.0, 55.0, 90.0], len(segments))
+    subscriptions = ["Basic", "Standard", "Premium"] * len(segments)
+    batch = engine.recommend_batch(ids, churn_prob, subscriptions)
+    assert list(batch) == [engine.recommend(*row) for row in zip(ids, churn_prob, subscriptions)]
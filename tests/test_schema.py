@@ -0,0 +1,43 @@
+# test_schema.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from schema import INTEGER_COLUMNS, OUTPUT_DTYPES, apply_input_schema, apply_output_schema
+
+
+@pytest.mark.parametrize("values", [
+    [0, 5, 127],                   # fits every declared type
+    [-5, 30, 300],                 # outside int8
+    [1, 2, 70_000],                # outside int16
+    [1, 2, 2 ** 24 + 1],           # not representable in float32
+    [1.0, np.nan, 3.0],            # missing value
+    [1.5, 2.0, 3.0],               # fractional
+    [],
+])
+@pytest.mark.parametrize("col", list(INTEGER_COLUMNS))
+def test_integer_narrowing_is_lossless(col, values):
+    original = pd.Series(values, dtype=np.float64 if any(isinstance(v, float) for v in values) else np.int64)
+    narrowed = apply_input_schema(pd.DataFrame({col: original}))[col]
+    np.testing.assert_array_equal(narrowed.to_numpy(dtype=np.float64), original.to_numpy(dtype=np.float64))
+    if len(values) and original.notna().all() and max(values) <= np.iinfo(INTEGER_COLUMNS[col]).max \
+            and min(values) >= np.iinfo(INTEGER_COLUMNS[col]).min and (original % 1 == 0).all():
+        assert narrowed.dtype == INTEGER_COLUMNS[col]
+
+
+def test_input_schema_leaves_values_unchanged():
+    df = pd.DataFrame({"age": [30, 45], "watch_hours": [1.25, 7.5], "region": ["Asia", "Europe"]})
+    narrowed = apply_input_schema(df.copy())
+    assert narrowed["age"].dtype == np.int8 and narrowed["watch_hours"].dtype == np.float32
+    assert isinstance(narrowed["region"].dtype, pd.CategoricalDtype)
+    widened = narrowed.astype({"age": np.int64, "watch_hours": np.float64, "region": df["region"].dtype})
+    pd.testing.assert_frame_equal(widened, df)
+
+
+def test_output_schema_is_compact_and_keeps_scores():
+    df = pd.DataFrame({"segment": [0, 3], "churn_prob": [12.34, 87.65], "monthly_revenue": [899, 1799]})
+    scored = apply_output_schema(df.copy())
+    assert {col: scored[col].dtype for col in ("segment", "churn_prob")} == \
+        {col: np.dtype(OUTPUT_DTYPES[col]) for col in ("segment", "churn_prob")}
+    assert scored["segment"].tolist() == [0, 3] and scored["monthly_revenue"].tolist() == [899, 1799]
+    np.testing.assert_allclose(scored["churn_prob"], df["churn_prob"], atol=1e-4)
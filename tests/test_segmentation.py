@@ -0,0 +1,43 @@
+# test_segmentation.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from model_registry import registry
+from segmentation import (SEGMENTATION_ARTIFACTS, categorical_cols, get_segmentation_projector, preprocess_input,
+                          assign_clusters)
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw", "netflix_customer_churn.csv")
+
+
+@pytest.fixture(scope="module")
+def customers():
+    df = pd.read_csv(DATA_PATH)
+    # Every categorical column gets rows with an unseen value and with NaN
+    edge = []
+    for col in categorical_cols:
+        for value in ("Unseen", np.nan):
+            row = df.iloc[len(edge)].copy()
+            row[col] = value
+            edge.append(row)
+    return pd.concat([df, pd.DataFrame(edge)], ignore_index=True)
+
+
+def test_projection_matches_reference_pipeline(customers):
+    projected = get_segmentation_projector().transform(customers)
+    np.testing.assert_allclose(projected, preprocess_input(customers), rtol=0, atol=1e-9)
+
+
+def test_clusters_match_reference_kmeans(customers):
+    kmeans = registry.get(SEGMENTATION_ARTIFACTS["kmeans_model"])
+    np.testing.assert_array_equal(assign_clusters(customers), kmeans.predict(preprocess_input(customers)))
+
+
+def test_single_profile_projection_matches_batch(customers):
+    projector = get_segmentation_projector()
+    sample = pd.concat([customers.iloc[:100], customers.iloc[-2 * len(categorical_cols):]])
+    expected = projector.transform(sample)
+    for i, profile in enumerate(sample.to_dict(orient="records")):
+        np.testing.assert_allclose(projector.transform_one(profile), expected[i:i + 1], rtol=0, atol=1e-12)
@@ -0,0 +1,81 @@
+# test_service.py
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from prediction import INPUT_COLUMNS
+from service import MicroBatcher, ScoringService, validate_profile
+from metrics import metrics
+
+PROFILE = {"age": 30, "gender": "Female", "subscription_type": "Basic", "watch_hours": 50.0, "last_login_days": 5,
+           "region": "Asia", "device": "Mobile", "payment_method": "Credit Card", "number_of_profiles": 2,
+           "avg_watch_time_per_day": 2.5, "favorite_genre": "Drama"}
+
+
+async def request(app, method, path, body=b""):
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {}
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        else:
+            response["body"] = message["body"]
+
+    await app({"type": "http", "method": method, "path": path, "headers": []}, receive, send)
+    return response["status"], response["body"]
+
+
+@pytest.mark.parametrize("field, value", [("number_of_profiles", 0), ("number_of_profiles", -1),
+                                          ("watch_hours", float("inf")), ("age", float("nan"))])
+def test_validate_profile_rejects_unscorable_numbers(field, value):
+    with pytest.raises(ValueError):
+        validate_profile({**PROFILE, field: value})
+
+
+def test_failed_batch_only_fails_the_bad_item():
+    def handler(items):
+        if any(item < 0 for item in items):
+            raise ValueError("negative")
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch_size=8, max_wait=0.05)
+        results = await asyncio.gather(*(batcher.submit(item) for item in [1, 2, -1, 3]), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert results[:2] == [2, 4] and results[3] == 6
+    assert isinstance(results[2], ValueError)
+
+
+def test_score_matches_pipeline_and_rejects_bad_profiles():
+    async def run():
+        app = ScoringService(max_batch_size=8, max_wait_ms=20)
+        profiles = [{**PROFILE, "watch_hours": 10.0 * i} for i in range(5)]
+        responses = await asyncio.gather(
+            *(request(app, "POST", "/score", json.dumps(p).encode()) for p in profiles),
+            request(app, "POST", "/score", json.dumps({**PROFILE, "number_of_profiles": 0}).encode()))
+        await app.shutdown()
+        return app, profiles, responses
+
+    app, profiles, responses = asyncio.run(run())
+    assert [status for status, _ in responses] == [200] * 5 + [422]
+    expected = app.pipeline.score(pd.DataFrame(profiles, columns=INPUT_COLUMNS))
+    for (_, body), churn_prob in zip(responses, expected["churn_prob"]):
+        assert json.loads(body)["churn_probability"] == churn_prob
+
+
+def test_unknown_paths_share_one_metric_label():
+    app = ScoringService()
+    metrics.reset()
+    for path in ("/nope", "/random/url"):
+        assert asyncio.run(request(app, "GET", path))[0] == 404
+    labels = [c["labels"]["endpoint"] for c in metrics.snapshot()["counters"] if c["name"] == "service_requests"]
+    assert labels == ["unknown"]
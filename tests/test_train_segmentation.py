@@ -0,0 +1,37 @@
+# test_train_segmentation.py
+import json
+import os
+
+import pytest
+
+from segmentation import SEGMENTATION_ARTIFACTS
+from recommendation import RULES_FILE
+from train_segmentation import DATA_PATH, load_customers, save, train
+
+
+@pytest.fixture(scope="module")
+def run():
+    return train(load_customers(DATA_PATH), k="4", k_range=(4, 4), silhouette_sample=500, n_jobs=1)
+
+
+def write_rules(output_dir, titles):
+    rules = {"default_offer": "default",
+             "rules": [{"min_churn_prob": 40, "segment_titles": titles, "offer": "offer"}]}
+    with open(os.path.join(output_dir, RULES_FILE), "w") as f:
+        json.dump(rules, f)
+
+
+def test_save_refuses_segments_the_rules_do_not_know(run, tmp_path, monkeypatch):
+    monkeypatch.delenv("RECOMMENDATION_RULES", raising=False)
+    write_rules(tmp_path, ["A segment this model does not have"])
+    with pytest.raises(ValueError, match="not in segments.json"):
+        save(run, str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == [RULES_FILE]
+
+
+def test_save_writes_artifacts_when_the_rules_match(run, tmp_path, monkeypatch):
+    monkeypatch.delenv("RECOMMENDATION_RULES", raising=False)
+    write_rules(tmp_path, [run["segments"][0]["title"]])
+    summary = save(run, str(tmp_path))
+    assert summary["n_segments"] == 4
+    assert set(SEGMENTATION_ARTIFACTS.values()) <= set(os.listdir(tmp_path))